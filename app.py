@@ -1,9 +1,12 @@
-from flask import Flask, render_template, jsonify, request, send_from_directory
+from flask import Flask, render_template, jsonify, request, send_from_directory, Response, stream_with_context
 from flask_cors import CORS
 from plexapi.server import PlexServer
 from plexapi.exceptions import NotFound
 from arrapi import RadarrAPI
 from apscheduler.schedulers.background import BackgroundScheduler
+from apscheduler.jobstores.base import JobLookupError
+from apscheduler.jobstores.sqlalchemy import SQLAlchemyJobStore
+from apscheduler.triggers.cron import CronTrigger
 from datetime import datetime, timedelta
 import pytz
 import os
@@ -11,18 +14,29 @@ import logging
 import json
 import groq
 from pydantic import BaseModel
-from typing import List
+from typing import List, Optional
 from translations import UI_TRANSLATIONS
 from translations import TRANSLATIONS
+from title_matching import normalize_title, title_numbers, year_gap, TitleTrigramIndex
 from imdb import Cinemagoer
-from concurrent.futures import ThreadPoolExecutor
-from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor, Future
 import re
+import math
 import requests
 from abc import ABC, abstractmethod
 from ollama import Client as OllamaClient
 from bs4 import BeautifulSoup
 import time 
+import threading
+import queue
+import uuid
+import sqlite3
+import unicodedata
+import zlib
+import fcntl
+from collections.abc import MutableMapping
+import numpy as np
+from cachetools import LRUCache
 
 
 
@@ -42,17 +56,197 @@ MODEL_SERVER = os.environ.get('MODEL_SERVER', 'GROQ')
 GROQ_API_KEY = os.environ.get('GROQ_API_KEY', '')
 OLLAMA_URL = os.environ.get('OLLAMA_URL', 'http://localhost:11434')
 MODEL = os.environ.get('MODEL', 'mixtral-8x7b-32768')
+PLEX_INDEX_REFRESH_INTERVAL = int(os.environ.get('PLEX_INDEX_REFRESH_INTERVAL', 60))
+PLEX_INDEX_RECONCILE_INTERVAL = int(os.environ.get('PLEX_INDEX_RECONCILE_INTERVAL', 900))
+IMDB_CACHE_FILE = os.environ.get('IMDB_CACHE_FILE', 'imdb_cache.db')
+IMDB_CACHE_TTL = int(os.environ.get('IMDB_CACHE_TTL', 30 * 24 * 3600))
+IMDB_CACHE_NEGATIVE_TTL = int(os.environ.get('IMDB_CACHE_NEGATIVE_TTL', 24 * 3600))
+IMDB_CACHE_MAX_ENTRIES = int(os.environ.get('IMDB_CACHE_MAX_ENTRIES', 20000))
+IMDB_REQUESTS_PER_SECOND = float(os.environ.get('IMDB_REQUESTS_PER_SECOND', 2))
+IMDB_WORKERS = int(os.environ.get('IMDB_WORKERS', 3))
+IMDB_QUEUE_SIZE = int(os.environ.get('IMDB_QUEUE_SIZE', 200))
+COLLECTION_WORKERS = int(os.environ.get('COLLECTION_WORKERS', 2))
+RECOMMENDATION_CACHE_TTL = int(os.environ.get('RECOMMENDATION_CACHE_TTL', 6 * 3600))
+RECOMMENDATION_CACHE_SIZE = int(os.environ.get('RECOMMENDATION_CACHE_SIZE', 256))
+LIBRARY_SEARCH_BUDGET = float(os.environ.get('LIBRARY_SEARCH_BUDGET', 30))
+LIBRARY_SEARCH_MAX_ROUNDS = int(os.environ.get('LIBRARY_SEARCH_MAX_ROUNDS', 4))
+SSE_HEARTBEAT_INTERVAL = int(os.environ.get('SSE_HEARTBEAT_INTERVAL', 15))
+PLEX_EDIT_WORKERS = int(os.environ.get('PLEX_EDIT_WORKERS', 4))
+FUZZY_MATCH_THRESHOLD = float(os.environ.get('FUZZY_MATCH_THRESHOLD', 0.6))
+PLEX_SEARCH_WORKERS = int(os.environ.get('PLEX_SEARCH_WORKERS', 4))
+VECTOR_INDEX_FILE = os.environ.get('VECTOR_INDEX_FILE', 'library_vectors.npz')
+VECTOR_DIMENSIONS = int(os.environ.get('VECTOR_DIMENSIONS', 1024))
+EMBEDDING_MODEL = os.environ.get('EMBEDDING_MODEL', '')
+LIBRARY_SHORTLIST_SIZE = int(os.environ.get('LIBRARY_SHORTLIST_SIZE', 60))
+METADATA_MAX_AGE = int(os.environ.get('METADATA_MAX_AGE', 300))
+RADARR_MOVIES_TTL = int(os.environ.get('RADARR_MOVIES_TTL', 600))
+RADARR_LOOKUP_WORKERS = int(os.environ.get('RADARR_LOOKUP_WORKERS', 4))
+STATE_DB_FILE = os.environ.get('STATE_DB_FILE', 'plexis_state.db')
+SCHEDULER_LOCK_FILE = os.environ.get('SCHEDULER_LOCK_FILE', 'scheduler.lock')
+SCHEDULER_LOCK_RETRY = int(os.environ.get('SCHEDULER_LOCK_RETRY', 30))
+SCHEDULER_SYNC_INTERVAL = int(os.environ.get('SCHEDULER_SYNC_INTERVAL', 60))
+SSE_POLL_INTERVAL = float(os.environ.get('SSE_POLL_INTERVAL', 1))
+# Chaque flux SSE occupe un thread gthread : par défaut la moitié des threads du worker au plus
+SSE_MAX_STREAMS = int(os.environ.get('SSE_MAX_STREAMS', int(os.environ.get('WEB_THREADS', 16)) // 2))
+SCHEDULER_DB_URL = os.environ.get('SCHEDULER_DB_URL', f"sqlite:///{STATE_DB_FILE}")
+COLLECTION_JOB_STALE_AFTER = int(os.environ.get('COLLECTION_JOB_STALE_AFTER', 600))
+COLLECTION_JOB_HEARTBEAT = int(os.environ.get('COLLECTION_JOB_HEARTBEAT', 60))
+COLLECTION_CHECK_MIN_DELAY = int(os.environ.get('COLLECTION_CHECK_MIN_DELAY', 60))
+COLLECTION_CHECK_MAX_DELAY = int(os.environ.get('COLLECTION_CHECK_MAX_DELAY', 3600))
+COLLECTION_RECONCILE_INTERVAL = int(os.environ.get('COLLECTION_RECONCILE_INTERVAL', 30))
+PLEX_ALERT_LISTENER = os.environ.get('PLEX_ALERT_LISTENER', '1') == '1'
+PLEX_ALERT_DEBOUNCE = float(os.environ.get('PLEX_ALERT_DEBOUNCE', 3))
+RADARR_WEBHOOK_TOKEN = os.environ.get('RADARR_WEBHOOK_TOKEN', '')
+RADARR_WEBHOOK_DELAY = float(os.environ.get('RADARR_WEBHOOK_DELAY', 30))
+LETTERBOXD_WORKERS = int(os.environ.get('LETTERBOXD_WORKERS', 4))
+LETTERBOXD_TIMEOUT = int(os.environ.get('LETTERBOXD_TIMEOUT', 20))
+LETTERBOXD_REFRESH_HOUR = int(os.environ.get('LETTERBOXD_REFRESH_HOUR', 0))
+LETTERBOXD_REFRESH_WINDOW = int(os.environ.get('LETTERBOXD_REFRESH_WINDOW', 120))
+LETTERBOXD_REFRESH_CONCURRENCY = int(os.environ.get('LETTERBOXD_REFRESH_CONCURRENCY', 2))
+LETTERBOXD_CHANGE_ALPHA = float(os.environ.get('LETTERBOXD_CHANGE_ALPHA', 0.3))
 plex = PlexServer(PLEX_URL, PLEX_TOKEN)
 radarr = RadarrAPI(RADARR_URL, RADARR_API_KEY)
 groq_client = groq.Client(api_key=GROQ_API_KEY)
 
 SETTINGS_FILE = 'user_settings.json'
 
-scheduler = BackgroundScheduler()
-scheduler.start()
+class SharedStore:
+    # État partagé entre les workers gunicorn : SQLite en WAL, une connexion par thread
+    def __init__(self, path):
+        self.path = path
+        self.local = threading.local()
+        db = self._db()
+        db.execute(
+            "CREATE TABLE IF NOT EXISTS records ("
+            "namespace TEXT, key TEXT, value TEXT, updated_at REAL, PRIMARY KEY (namespace, key))"
+        )
+        db.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER)")
+        db.execute("INSERT OR IGNORE INTO meta (key, value) VALUES ('version', 0)")
+        db.commit()
+
+    def _db(self):
+        db = getattr(self.local, 'db', None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=30)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            self.local.db = db
+        return db
+
+    def get(self, namespace, key):
+        row = self._db().execute(
+            "SELECT value FROM records WHERE namespace = ? AND key = ?", (namespace, key)
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put(self, namespace, key, value):
+        db = self._db()
+        with db:
+            db.execute(
+                "INSERT OR REPLACE INTO records (namespace, key, value, updated_at) VALUES (?, ?, ?, ?)",
+                (namespace, key, json.dumps(value), time.time())
+            )
+            db.execute("UPDATE meta SET value = value + 1 WHERE key = 'version'")
+
+    def touch(self, namespace, key):
+        db = self._db()
+        with db:
+            db.execute(
+                "UPDATE records SET updated_at = ? WHERE namespace = ? AND key = ?",
+                (time.time(), namespace, key)
+            )
+
+    def delete(self, namespace, key):
+        db = self._db()
+        with db:
+            deleted = db.execute(
+                "DELETE FROM records WHERE namespace = ? AND key = ?", (namespace, key)
+            ).rowcount
+            db.execute("UPDATE meta SET value = value + 1 WHERE key = 'version'")
+        return deleted > 0
+
+    def items(self, namespace):
+        rows = self._db().execute(
+            "SELECT key, value FROM records WHERE namespace = ? ORDER BY rowid", (namespace,)
+        ).fetchall()
+        return [(key, json.loads(value)) for key, value in rows]
+
+    def keys(self, namespace):
+        rows = self._db().execute(
+            "SELECT key FROM records WHERE namespace = ? ORDER BY rowid", (namespace,)
+        ).fetchall()
+        return [row[0] for row in rows]
+
+    def take(self, namespace):
+        # Lit et vide un namespace en une transaction : file de demandes entre workers
+        db = self._db()
+        with db:
+            db.execute("BEGIN IMMEDIATE")
+            keys = [row[0] for row in db.execute(
+                "SELECT key FROM records WHERE namespace = ? ORDER BY rowid", (namespace,)
+            ).fetchall()]
+            db.execute("DELETE FROM records WHERE namespace = ?", (namespace,))
+        return keys
+
+    def prune(self, namespace, max_entries):
+        # Garde les entrées les plus récemment utilisées
+        db = self._db()
+        with db:
+            db.execute(
+                "DELETE FROM records WHERE namespace = ? AND key NOT IN ("
+                "SELECT key FROM records WHERE namespace = ? ORDER BY updated_at DESC LIMIT ?)",
+                (namespace, namespace, max_entries)
+            )
+
+    def version(self):
+        return self._db().execute("SELECT value FROM meta WHERE key = 'version'").fetchone()[0]
+
+class StoreDict(MutableMapping):
+    # Vue dict d'un namespace : les valeurs lues sont des copies, il faut les réécrire après modification
+    def __init__(self, store, namespace):
+        self.store = store
+        self.namespace = namespace
+
+    def __getitem__(self, key):
+        value = self.store.get(self.namespace, key)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key, value):
+        self.store.put(self.namespace, key, value)
+
+    def __delitem__(self, key):
+        if not self.store.delete(self.namespace, key):
+            raise KeyError(key)
+
+    def __iter__(self):
+        return iter(self.store.keys(self.namespace))
 
-collections_in_progress = {}
-letterboxd_collections = {}
+    def __len__(self):
+        return len(self.store.keys(self.namespace))
+
+    def items(self):
+        return self.store.items(self.namespace)
+
+    def values(self):
+        return [value for _, value in self.store.items(self.namespace)]
+
+shared_store = SharedStore(STATE_DB_FILE)
+
+# Les tâches des collections survivent aux redémarrages ; les tâches internes sont recréées au démarrage
+scheduler = BackgroundScheduler(jobstores={
+    'default': {'type': 'memory'},
+    'persistent': SQLAlchemyJobStore(url=SCHEDULER_DB_URL, tablename='apscheduler_jobs')
+})
+scheduler_lock_file = None
+
+collections_in_progress = StoreDict(shared_store, 'collections_in_progress')
+letterboxd_collections = StoreDict(shared_store, 'letterboxd_collections')
+collection_executor = ThreadPoolExecutor(max_workers=COLLECTION_WORKERS)
+letterboxd_refresh_slots = threading.BoundedSemaphore(LETTERBOXD_REFRESH_CONCURRENCY)
+collections_changed = threading.Condition()
+sse_stream_slots = threading.BoundedSemaphore(max(SSE_MAX_STREAMS, 1))
 
 DEFAULT_ROOT_FOLDER = "/movies"
 DEFAULT_QUALITY_PROFILE = "HD-1080p"
@@ -73,6 +267,10 @@ class AIClient(ABC):
     def chat_completion(self, messages, model, temperature=0.2):
         pass
 
+    @abstractmethod
+    def chat_completion_stream(self, messages, model, temperature=0.2):
+        pass
+
 class GroqClient(AIClient):
     def __init__(self, api_key):
         self.client = groq.Client(api_key=api_key)
@@ -105,6 +303,19 @@ class GroqClient(AIClient):
             stream=False,
             response_format={"type": "json_object"},
         )
+
+    def chat_completion_stream(self, messages, model, temperature=0.2):
+        # Le mode JSON de Groq ne se combine pas avec le streaming : le schéma du prompt suffit
+        stream = self.client.chat.completions.create(
+            messages=messages,
+            model=model,
+            temperature=temperature,
+            stream=True,
+        )
+        for chunk in stream:
+            content = chunk.choices[0].delta.content
+            if content:
+                yield content
     
 
 
@@ -127,11 +338,15 @@ class OllamaClientWrapper(AIClient):
         except Exception:
             return False
 
+    def build_prompt(self, messages):
+        prompt = "\n".join([f"{msg['role']}: {msg['content']}" for msg in messages])
+        prompt += "\nReply with a JSON object containing a 'movies' array of movie objects with 'title' and 'year' properties, plus 'id' when the movie comes from a provided list."
+        return prompt
+
     def chat_completion(self, messages, model, temperature=0.2):
         try:
             # Construire le prompt
-            prompt = "\n".join([f"{msg['role']}: {msg['content']}" for msg in messages])
-            prompt += "\nReply with a JSON object containing a 'movies' array of movie objects with 'title' and 'year' properties."
+            prompt = self.build_prompt(messages)
             
             response = self.client.generate(
                 model=model,
@@ -160,6 +375,19 @@ class OllamaClientWrapper(AIClient):
         except Exception as e:
             logging.error(f"Error in Ollama chat completion: {str(e)}")
             raise
+
+    def chat_completion_stream(self, messages, model, temperature=0.2):
+        for part in self.client.generate(
+            model=model,
+            prompt=self.build_prompt(messages),
+            options={
+                "temperature": temperature
+            },
+            format="json",
+            stream=True,
+        ):
+            if part.get('response'):
+                yield part['response']
         
 if MODEL_SERVER == 'GROQ':
     ai_client = GroqClient(GROQ_API_KEY)
@@ -202,7 +430,39 @@ def check_api_configurations():
     return errors
 
 
-SETTINGS = load_settings()
+class SharedSettings(MutableMapping):
+    # Réglages lus dans le store à chaque accès : un /save_settings vaut pour tous les workers.
+    # Le fichier reste la source au démarrage et la sauvegarde
+    def __init__(self, store, initial):
+        self.store = store
+        self.store.put('settings', 'current', initial)
+
+    def _current(self):
+        return self.store.get('settings', 'current') or {}
+
+    def __getitem__(self, key):
+        return self._current()[key]
+
+    def __setitem__(self, key, value):
+        self.update({key: value})
+
+    def __delitem__(self, key):
+        current = self._current()
+        del current[key]
+        self.store.put('settings', 'current', current)
+
+    def __iter__(self):
+        return iter(self._current())
+
+    def __len__(self):
+        return len(self._current())
+
+    def update(self, other=(), **kwargs):
+        current = self._current()
+        current.update(other, **kwargs)
+        self.store.put('settings', 'current', current)
+
+SETTINGS = SharedSettings(shared_store, load_settings())
 
 ROOT_FOLDER = SETTINGS['root_folder']
 QUALITY_PROFILE = SETTINGS['quality_profile']
@@ -235,15 +495,90 @@ def test_ollama():
     except Exception as e:
         return jsonify({"success": False, "error": str(e)})
 
-@lru_cache(maxsize=1000)
+class InvalidationBus:
+    # Événements internes ("radarr_added", "plex_item_added", "plex_item_removed") portant les IMDb IDs et titres concernés
+    def __init__(self):
+        self.handlers = {}
+
+    def subscribe(self, event, handler):
+        self.handlers.setdefault(event, []).append(handler)
+
+    def publish(self, event, imdb_ids=(), titles=()):
+        imdb_ids = [imdb_id for imdb_id in imdb_ids if imdb_id]
+        titles = [title for title in titles if title]
+        logging.info(f"Invalidation event {event}: {len(imdb_ids)} IMDb IDs, {len(titles)} titles")
+        for handler in self.handlers.get(event, []):
+            try:
+                handler(imdb_ids=imdb_ids, titles=titles)
+            except Exception as e:
+                logging.error(f"Error handling {event}: {str(e)}")
+
+invalidation_bus = InvalidationBus()
+
+plex_membership_cache = LRUCache(maxsize=1000)
+plex_membership_lock = threading.Lock()
+
 def cached_is_movie_in_plex(title, imdb_id):
-    return is_movie_in_plex(title, imdb_id)
+    key = (title, imdb_id)
+    with plex_membership_lock:
+        if key in plex_membership_cache:
+            return plex_membership_cache[key]
+    result = is_movie_in_plex(title, imdb_id)
+    with plex_membership_lock:
+        plex_membership_cache[key] = result
+    return result
+
+def evict_plex_membership(imdb_ids=(), titles=()):
+    # Seules les entrées des films concernés sont retirées, le reste du cache reste chaud
+    imdb_ids = {format_imdb_id(imdb_id) for imdb_id in imdb_ids}
+    titles = {normalize_title(title) for title in titles}
+    with plex_membership_lock:
+        stale = [
+            key for key in plex_membership_cache
+            if format_imdb_id(key[1]) in imdb_ids or normalize_title(key[0]) in titles
+        ]
+        for key in stale:
+            del plex_membership_cache[key]
+    if stale:
+        logging.info(f"Evicted {len(stale)} Plex membership entries")
+
+for event in ('radarr_added', 'plex_item_added', 'plex_item_removed'):
+    invalidation_bus.subscribe(event, evict_plex_membership)
 
 @app.route('/clear_cache', methods=['POST'])
 def clear_cache():
-    cached_is_movie_in_plex.cache_clear()
+    with plex_membership_lock:
+        plex_membership_cache.clear()
     return jsonify({"message": "Cache cleared"}), 200
 
+def get_library_version():
+    try:
+        index = get_plex_index()
+        # Empreinte stable d'un worker à l'autre, contrairement au compteur de version local
+        return (index.section_title, index.stamp())
+    except Exception as e:
+        logging.error(f"Error reading Plex library version: {str(e)}")
+        return None
+
+def recommendation_cache_key(theme, count, option, language):
+    # La version de l'index Plex invalide les résultats dès que la bibliothèque change
+    return (' '.join(theme.lower().split()), count, option, language, SETTINGS['model'], get_library_version())
+
+def get_cached_recommendations(key):
+    key = json.dumps(key)
+    entry = shared_store.get('recommendations', key)
+    if entry is None or entry['expires_at'] < time.time():
+        return None
+    shared_store.touch('recommendations', key)
+    return entry['movies']
+
+def set_cached_recommendations(key, movies):
+    shared_store.put('recommendations', json.dumps(key), {
+        'movies': [dict(movie) for movie in movies],
+        'expires_at': time.time() + RECOMMENDATION_CACHE_TTL
+    })
+    shared_store.prune('recommendations', RECOMMENDATION_CACHE_SIZE)
+
 @app.route('/search_movies', methods=['POST'])
 def search_movies():
     data = request.json
@@ -251,43 +586,44 @@ def search_movies():
     count = int(data['count'])
     option = data['option']
     language = SETTINGS['language']
+    use_cache = not data.get('no_cache', False)
 
     logging.warning(f" theme={theme}, Count={count}, Option={option}")
 
-    try:
-        recommendations = get_recommendations_from_ai(theme, count, option, language)
-        if not recommendations:
-            config_errors = check_api_configurations()
-            if config_errors:
-                return jsonify({'error': 'configuration_error', 'details': config_errors}), 400
-            return jsonify({'error': 'Unable to get movie recommendations'}), 500
-
-        def check_movie(movie):
-            movie_title = movie['title']
-            movie_year = str(movie['year'])
-            imdb_id = get_imdb_id(f"{movie_title} ({movie_year})")
-            movie['imdb_id'] = imdb_id
-            
-            if option in ['library', 'mixed']:
-                movie['in_library'] = cached_is_movie_in_plex(movie_title, imdb_id)
-            else:
-                movie['in_library'] = False
-            
-            logging.warning(f"Film vérifié : {movie_title} ({movie_year}) - IMDb ID: {imdb_id} - Dans la bibliothèque : {movie['in_library']}")
-            return movie
-
-        with ThreadPoolExecutor(max_workers=10) as executor:
-            checked_recommendations = list(executor.map(check_movie, recommendations))
+    cache_key = recommendation_cache_key(theme, count, option, language)
+    if use_cache:
+        cached_movies = get_cached_recommendations(cache_key)
+        if cached_movies is not None:
+            logging.warning(f"Recommandations servies depuis le cache : {len(cached_movies)}")
+            return jsonify({'movies': cached_movies, 'cached': True})
 
+    try:
         if option == 'library':
-            final_recommendations = [movie for movie in checked_recommendations if movie['in_library']]
+            # Sur-demande et relances jusqu'à obtenir 'count' films de la bibliothèque
+            final_recommendations = list(search_library_movies(theme, count, language))
         else:  # 'mixed' ou 'discovery'
-            final_recommendations = checked_recommendations
+            recommendations = get_recommendations_from_ai(theme, count, option, language)
+            if not recommendations:
+                config_errors = check_api_configurations()
+                if config_errors:
+                    return jsonify({'error': 'configuration_error', 'details': config_errors}), 400
+                return jsonify({'error': 'Unable to get movie recommendations'}), 500
+
+            imdb_ids = resolve_imdb_ids([f"{movie['title']} ({movie['year']})" for movie in recommendations])
+
+            with ThreadPoolExecutor(max_workers=10) as executor:
+                final_recommendations = list(executor.map(
+                    lambda movie: check_movie(movie, option, imdb_ids.get(f"{movie['title']} ({movie['year']})")),
+                    recommendations
+                ))
 
         # Limiter le nombre de résultats à 'count'
         final_recommendations = final_recommendations[:count]
 
         logging.warning(f"Nombre de recommandations finales : {len(final_recommendations)}")
+        # Comme pour le flux : un résultat vide (modèle ou bibliothèque muets) n'est pas gardé
+        if final_recommendations:
+            set_cached_recommendations(cache_key, final_recommendations)
         return jsonify({'movies': final_recommendations})
     
     except Exception as e:
@@ -297,6 +633,174 @@ def search_movies():
             return jsonify({'error': 'configuration_error', 'details': config_errors}), 400
         return jsonify({'error': 'An unexpected error occurred'}), 500
 
+library_hit_rate = {"value": 0.5}
+library_hit_rate_lock = threading.Lock()
+
+def library_request_size(needed):
+    # Nombre de films à demander au modèle pour en garder 'needed' au vu du taux de réussite observé
+    with library_hit_rate_lock:
+        hit_rate = library_hit_rate["value"]
+    return min(max(needed, math.ceil(needed / max(hit_rate, 0.25))), needed * 4, 50)
+
+def record_library_hit_rate(hits, total):
+    if not total:
+        return
+    with library_hit_rate_lock:
+        library_hit_rate["value"] = 0.7 * library_hit_rate["value"] + 0.3 * (hits / total)
+
+def check_library_movie(movie, index):
+    # Vérification locale via l'index Plex : pas de recherche IMDb pour les films de la bibliothèque
+    rating_key = index.find_by_title(movie['title'], movie['year'])
+    movie['in_library'] = rating_key is not None
+    movie['imdb_id'] = format_imdb_id(index.get(rating_key)['guids'].get('imdb')) if rating_key else None
+    return movie
+
+def movie_key(movie):
+    return (normalize_title(movie['title']), str(movie['year']))
+
+def search_library_movies(theme, count, language, digest=None, seen=None, found_count=0, deadline=None):
+    index = get_plex_index()
+    digest = digest or get_library_shortlist_digest(theme, count)
+    seen = seen if seen is not None else {}
+    deadline = deadline or time.monotonic() + LIBRARY_SEARCH_BUDGET
+    rounds = 0
+    while found_count < count and rounds < LIBRARY_SEARCH_MAX_ROUNDS and time.monotonic() < deadline:
+        rounds += 1
+        needed = count - found_count
+        try:
+            recommendations = get_recommendations_from_ai(
+                theme, library_request_size(needed), 'library', language, digest, exclude=list(seen.values())
+            )
+        except Exception as e:
+            if found_count == 0 and not seen:
+                raise
+            logging.error(f"Library backfill round {rounds} failed: {str(e)}")
+            break
+        apply_library_ids(recommendations, digest)
+        new_movies = [movie for movie in recommendations if movie_key(movie) not in seen]
+        if not new_movies:
+            break
+        for movie in new_movies:
+            seen[movie_key(movie)] = f"{movie['title']} ({movie['year']})"
+        hits = [movie for movie in new_movies if check_library_movie(movie, index)['in_library']]
+        record_library_hit_rate(len(hits), len(new_movies))
+        logging.warning(f"Library round {rounds}: {len(hits)}/{len(new_movies)} in library")
+        for movie in hits[:needed]:
+            found_count += 1
+            yield movie
+
+def check_movie(movie, option, imdb_id):
+    movie_title = movie['title']
+    movie_year = str(movie['year'])
+    movie['imdb_id'] = imdb_id
+    
+    if option in ['library', 'mixed']:
+        movie['in_library'] = cached_is_movie_in_plex(movie_title, imdb_id)
+    else:
+        movie['in_library'] = False
+    
+    logging.warning(f"Film vérifié : {movie_title} ({movie_year}) - IMDb ID: {imdb_id} - Dans la bibliothèque : {movie['in_library']}")
+    return movie
+
+@app.route('/search_movies/stream', methods=['POST'])
+def search_movies_stream():
+    data = request.json
+    theme = data['theme']
+    count = int(data['count'])
+    option = data['option']
+    language = SETTINGS['language']
+    use_cache = not data.get('no_cache', False)
+
+    logging.warning(f" theme={theme}, Count={count}, Option={option} (stream)")
+
+    cache_key = recommendation_cache_key(theme, count, option, language)
+    cached_movies = get_cached_recommendations(cache_key) if use_cache else None
+
+    def resolve_and_check(movie):
+        return check_movie(movie, option, resolve_imdb_id(f"{movie['title']} ({movie['year']})"))
+
+    def emit(results, movie):
+        future = Future()
+        future.set_result(movie)
+        results.put(('movie', future))
+
+    def produce_library(results):
+        # Premier tour en streaming (sur-demandé), puis relances hors streaming pour compléter
+        index = get_plex_index()
+        digest = get_library_shortlist_digest(theme, count)
+        deadline = time.monotonic() + LIBRARY_SEARCH_BUDGET
+        seen = {}
+        hits = 0
+        for movie in stream_recommendations_from_ai(theme, library_request_size(count), option, language, digest):
+            apply_library_ids([movie], digest)
+            if movie_key(movie) in seen:
+                continue
+            seen[movie_key(movie)] = f"{movie['title']} ({movie['year']})"
+            if check_library_movie(movie, index)['in_library']:
+                hits += 1
+                emit(results, movie)
+        record_library_hit_rate(hits, len(seen))
+        for movie in search_library_movies(theme, count, language, digest, seen, hits, deadline):
+            emit(results, movie)
+
+    def produce(results):
+        # Chaque film est vérifié dès que le modèle l'a écrit, pendant que la suite est générée
+        try:
+            if option == 'library':
+                produce_library(results)
+            else:
+                seen = set()
+                with ThreadPoolExecutor(max_workers=10) as executor:
+                    for movie in stream_recommendations_from_ai(theme, count, option, language):
+                        if movie_key(movie) in seen:
+                            continue
+                        seen.add(movie_key(movie))
+                        future = executor.submit(resolve_and_check, movie)
+                        future.add_done_callback(lambda f: results.put(('movie', f)))
+        except Exception as e:
+            logging.error(f"Error in search_movies_stream: {str(e)}")
+            results.put(('error', e))
+        results.put(('done', None))
+
+    def events():
+        if cached_movies is not None:
+            for movie in cached_movies:
+                yield json.dumps({"type": "movie", "movie": movie}) + "\n"
+            yield json.dumps({"type": "done", "count": len(cached_movies), "cached": True}) + "\n"
+            return
+
+        results = queue.Queue()
+        threading.Thread(target=produce, args=(results,), daemon=True).start()
+        sent = []
+        failed = False
+        while True:
+            kind, payload = results.get()
+            if kind == 'movie':
+                try:
+                    movie = payload.result()
+                except Exception as e:
+                    logging.error(f"Error checking streamed movie: {str(e)}")
+                    continue
+                if len(sent) >= count or (option == 'library' and not movie['in_library']):
+                    continue
+                sent.append(movie)
+                yield json.dumps({"type": "movie", "movie": movie}) + "\n"
+            elif kind == 'error':
+                failed = True
+                config_errors = check_api_configurations()
+                if config_errors:
+                    yield json.dumps({"type": "error", "error": "configuration_error", "details": config_errors}) + "\n"
+                else:
+                    yield json.dumps({"type": "error", "error": "ai_error"}) + "\n"
+            else:
+                logging.warning(f"Nombre de recommandations envoyées : {len(sent)}")
+                if sent and not failed:
+                    set_cached_recommendations(cache_key, sent)
+                yield json.dumps({"type": "done", "count": len(sent)}) + "\n"
+                return
+
+    return Response(stream_with_context(events()), mimetype='application/x-ndjson')
+
 @app.route('/create_collection', methods=['POST'])
 def create_collection():
     data = request.json
@@ -306,42 +810,176 @@ def create_collection():
     if not collection_name or not selected_movies:
         return jsonify({"error": "Missing collection name or selected movies"}), 400
 
-    movies_in_plex = []
-    movies_to_add = []
     logging.warning(selected_movies)
-    for movie in selected_movies:
-        imdb_id = get_imdb_id(movie)  # Vous devrez implémenter cette fonction
-        if is_movie_in_plex(movie, imdb_id):
-            movies_in_plex.append(movie)
-        else:
-            movies_to_add.append(movie)
-
-    add_missing_movies_to_radarr(movies_to_add)
-    requests.post('http://localhost:9999/clear_cache')
+    job_id = uuid.uuid4().hex
+    # Toutes les clés sont posées ici : le worker ne fait que les mettre à jour
     collections_in_progress[collection_name] = {
         'name': collection_name,
         'movies': selected_movies,
-        'added_count': len(movies_in_plex),
+        'added_count': 0,
         'total_count': len(selected_movies),
-        'status': 'En cours'
+        'status': 'En cours',
+        'job_id': job_id,
+        'job_status': 'queued',
+        'resolved_count': 0,
+        'movies_in_plex': [],
+        'movies_to_add': [],
+        'movie_states': {},
+        'check_attempts': 0,
+        'error': None
     }
-
-    scheduler.add_job(
-        check_collection_status,
-        'date',
-        run_date=datetime.now(TIMEZONE) + timedelta(minutes=1),
-        args=[collection_name],
-        id=f"check_{collection_name}",
-        replace_existing=True,
-        misfire_grace_time=300
-    )
+    notify_collections_changed()
+    submit_collection_job(collection_name, job_id)
 
     return jsonify({
         "message": "Collection creation process started",
         "collection_name": collection_name,
-        "movies_in_plex": movies_in_plex,
-        "movies_to_add": movies_to_add
-    })
+        "job_id": job_id
+    }), 202
+
+local_collection_jobs = set()
+local_collection_jobs_lock = threading.Lock()
+
+def submit_collection_job(collection_name, job_id):
+    # Battement de cœur dès la mise en file : un job en attente dans ce worker n'est pas "perdu"
+    with local_collection_jobs_lock:
+        local_collection_jobs.add(job_id)
+    shared_store.put('job_heartbeats', job_id, time.time())
+
+    def run():
+        try:
+            run_create_collection_job(collection_name, job_id)
+        finally:
+            with local_collection_jobs_lock:
+                local_collection_jobs.discard(job_id)
+            shared_store.delete('job_heartbeats', job_id)
+
+    collection_executor.submit(run)
+
+def beat_collection_jobs():
+    # Un seul thread par worker entretient les battements de tous ses jobs, y compris pendant les étapes longues
+    while True:
+        time.sleep(COLLECTION_JOB_HEARTBEAT)
+        with local_collection_jobs_lock:
+            job_ids = list(local_collection_jobs)
+        for job_id in job_ids:
+            try:
+                shared_store.put('job_heartbeats', job_id, time.time())
+            except Exception as e:
+                logging.error(f"Error writing heartbeat for job {job_id}: {str(e)}")
+
+threading.Thread(target=beat_collection_jobs, daemon=True).start()
+
+def run_create_collection_job(collection_name, job_id):
+    collection = collections_in_progress.get(collection_name)
+    if not collection or collection.get('job_id') != job_id:
+        return
+
+    def save():
+        # Le dict lu dans le store est une copie : on le réécrit pour les autres workers, sauf si la
+        # collection a été supprimée ou recréée par un autre job entre-temps
+        current = collections_in_progress.get(collection_name)
+        if not current or current.get('job_id') != job_id:
+            logging.warning(f"Collection job {job_id} for '{collection_name}' was superseded, stopping")
+            return False
+        collections_in_progress[collection_name] = collection
+        notify_collections_changed()
+        return True
+
+    try:
+        collection['job_status'] = 'resolving'
+        if not save():
+            return
+        imdb_ids = resolve_collection_imdb_ids(collection)
+        collection['resolved_count'] = len([imdb_id for imdb_id in imdb_ids.values() if imdb_id])
+
+        index = get_plex_index()
+        states = get_movie_states(collection)
+        rating_keys = []
+        movies_in_plex = []
+        movies_to_add = []
+        for movie in collection['movies']:
+            rating_key = index.find_by_imdb(imdb_ids.get(movie))
+            if rating_key:
+                states[movie]['rating_key'] = rating_key
+                rating_keys.append(rating_key)
+                movies_in_plex.append(movie)
+            else:
+                movies_to_add.append(movie)
+        collection['movies_in_plex'] = movies_in_plex
+        collection['movies_to_add'] = movies_to_add
+
+        # Tag Plex et ajouts Radarr en parallèle
+        collection['job_status'] = 'processing'
+        if not save():
+            return
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            tagging = executor.submit(add_movies_to_plex_collection, collection_name, rating_keys)
+            executor.submit(add_missing_movies_to_radarr, movies_to_add).result()
+            tagged = set(tagging.result())
+        for state in states.values():
+            if state['rating_key'] in tagged:
+                state['tagged'] = True
+        collection['added_count'] = len(tagged)
+        if collection['added_count'] == len(collection['movies']):
+            collection['status'] = 'Terminé'
+
+        collection['job_status'] = 'done'
+        logging.warning(f"Collection job {job_id} for '{collection_name}': {len(movies_in_plex)} in Plex, {len(movies_to_add)} sent to Radarr")
+    except Exception as e:
+        collection['job_status'] = 'error'
+        collection['error'] = str(e)
+        logging.error(f"Error in collection job {job_id} for '{collection_name}': {str(e)}")
+    # La suite est prise en charge par reconcile_collections
+    collection['next_check'] = (datetime.now(TIMEZONE) + timedelta(seconds=COLLECTION_CHECK_MIN_DELAY)).isoformat()
+    save()
+
+def get_movie_states(collection):
+    # État par titre : IMDb ID résolu, ratingKey trouvé, déjà tagué dans la collection Plex
+    states = collection.setdefault('movie_states', {})
+    legacy_ids = collection.pop('imdb_ids', None) or {}
+    for movie in collection['movies']:
+        states.setdefault(movie, {'imdb_id': legacy_ids.get(movie), 'rating_key': None, 'tagged': False})
+    return states
+
+def resolve_collection_imdb_ids(collection, movies=None):
+    # Les titres déjà résolus sont gardés dans la collection, seuls les autres sont recherchés
+    states = get_movie_states(collection)
+    movies = collection['movies'] if movies is None else movies
+    pending = [movie for movie in movies if not states[movie]['imdb_id']]
+    if pending:
+        for movie, imdb_id in resolve_imdb_ids(pending).items():
+            states[movie]['imdb_id'] = imdb_id
+    return {movie: states[movie]['imdb_id'] for movie in movies}
+
+def add_movies_to_plex_collection(collection_name, rating_keys):
+    index = get_plex_index()
+    rating_keys = list(dict.fromkeys(rating_keys))
+    if not rating_keys:
+        return []
+
+    # Un GET pour tous les films puis un seul PUT sur la collection
+    try:
+        section = plex.library.section(index.section_title)
+        items = plex.fetchItems(f"/library/metadata/{','.join(rating_keys)}")
+        try:
+            section.collection(collection_name).addItems(items)
+        except NotFound:
+            section.createCollection(collection_name, items=items)
+        return [str(item.ratingKey) for item in items]
+    except Exception as e:
+        logging.error(f"Batch edit of collection '{collection_name}' failed, tagging one by one: {str(e)}")
+
+    def tag(rating_key):
+        try:
+            index.fetch(rating_key).addCollection(collection_name)
+            return rating_key
+        except Exception as e:
+            logging.error(f"Error adding {rating_key} to collection '{collection_name}': {str(e)}")
+            return None
+
+    with ThreadPoolExecutor(max_workers=PLEX_EDIT_WORKERS) as executor:
+        return [rating_key for rating_key in executor.map(tag, rating_keys) if rating_key]
 
 @app.route('/process_letterboxd_list', methods=['POST'])
 def process_letterboxd_list_route():
@@ -352,17 +990,15 @@ def process_letterboxd_list_route():
         return jsonify({"error": "Invalid Letterboxd URL"}), 400
 
     try:
-        movies = get_movies_from_letterboxd(url)
-        collection_name = get_letterboxd_list_title(url)
+        letterboxd_list = fetch_letterboxd_list(url)
+        movies = letterboxd_list['movies']
+        collection_name = letterboxd_list['title']
         
-        movies_status = []
-        for movie in movies:
-            title, year = parse_movie_title(movie)
-            in_plex = is_movie_in_plex_letterboxd(title, year)
-            movies_status.append({
-                "title": movie,
-                "in_plex": in_plex
-            })
+        matches = match_movies_in_plex([parse_movie_title(movie) for movie in movies])
+        movies_status = [
+            {"title": movie, "in_plex": rating_key is not None}
+            for movie, rating_key in zip(movies, matches)
+        ]
 
         return jsonify({
             "collection_name": collection_name,
@@ -386,23 +1022,22 @@ def create_letterboxd_collection():
 
     try:
         # Créer la collection dans Plex
-        plex_library = plex.library.section(SETTINGS['plex_library'])
-        plex_movies = []
+        rating_keys = {}
         movies_in_plex = []
         movies_to_add = []
 
-        for movie in selected_movies:
-            title, year = parse_movie_title(movie['title'])
-            if movie['in_plex']:
-                plex_movie = plex_library.search(title=title, year=year)[0]
-                plex_movies.append(plex_movie)
+        matches = match_movies_in_plex([parse_movie_title(movie['title']) for movie in selected_movies])
+        for movie, rating_key in zip(selected_movies, matches):
+            if rating_key:
+                rating_keys[movie['title']] = rating_key
                 movies_in_plex.append(movie['title'])
             else:
                 movies_to_add.append(movie['title'])
 
-        if plex_movies:
-            plex_collection = plex_library.createCollection(collection_name, movies=plex_movies)
-            print(f"Created Plex collection: {collection_name} with {len(plex_movies)} movies")
+        tagged = set()
+        if rating_keys:
+            tagged = set(add_movies_to_plex_collection(collection_name, list(rating_keys.values())))
+            print(f"Created Plex collection: {collection_name} with {len(tagged)} movies")
 
         # Ajouter les films manquants à Radarr
         add_missing_movies_to_radarr(movies_to_add)
@@ -412,21 +1047,14 @@ def create_letterboxd_collection():
             'name': collection_name,
             'url': letterboxd_url,
             'movies': [movie['title'] for movie in selected_movies],
+            'missing': movies_to_add + [title for title, rating_key in rating_keys.items() if rating_key not in tagged],
+            'rating_keys': {title: rating_key for title, rating_key in rating_keys.items() if rating_key in tagged},
             'last_updated': datetime.now(TIMEZONE).isoformat(),
             'is_letterboxd': True
         }
+        notify_collections_changed()
 
-        # Planifier une mise à jour quotidienne
-        scheduler.add_job(
-            update_letterboxd_collection,
-            'cron',
-            hour=0,
-            minute=1,
-            args=[collection_name],
-            id=f"update_letterboxd_{collection_name}",
-            replace_existing=True
-        )
-
+        # Mise à jour quotidienne via dispatch_letterboxd_refreshes
         return jsonify({
             "message": "Letterboxd collection added successfully",
             "name": collection_name,
@@ -467,13 +1095,15 @@ def delete_collection():
         if collection_name in letterboxd_collections:
             del letterboxd_collections[collection_name]
             logging.warning(f"Deleted collection from letterboxd_collections")
+        notify_collections_changed()
 
-        # Supprimer la tâche planifiée si elle existe
-        try:
-            scheduler.remove_job(f"update_letterboxd_{collection_name}")
-            logging.warning(f"Removed scheduler job for collection")
-        except JobLookupError:
-            logging.warning(f"No scheduler job found for collection")
+        # Supprimer les tâches planifiées du store partagé si elles existent
+        for job_id in (f"update_letterboxd_{collection_name}",):
+            try:
+                scheduler.remove_job(job_id, jobstore='persistent')
+                logging.warning(f"Removed scheduler job {job_id}")
+            except JobLookupError:
+                logging.warning(f"No scheduler job {job_id}")
 
         logging.warning(f"Collection {collection_name} deleted successfully")
         return jsonify({"message": "Collection deleted successfully"}), 200
@@ -489,19 +1119,103 @@ def get_collections_status():
     all_collections.extend(letterboxd_collections.values())
     return jsonify(all_collections)
 
+def notify_collections_changed():
+    # Réveille les flux SSE de ce worker ; les autres voient la version du store changer
+    with collections_changed:
+        collections_changed.notify_all()
+
+def snapshot_collections():
+    # Copie JSON pour comparer sans être gêné par les mises à jour des workers
+    all_collections = list(collections_in_progress.values()) + list(letterboxd_collections.values())
+    return {collection['name']: json.loads(json.dumps(collection)) for collection in all_collections}
+
+@app.route('/collections_status/stream')
+def stream_collections_status():
+    # Au-delà de SSE_MAX_STREAMS flux dans ce worker, le client repasse au polling de /collections_status
+    if SSE_MAX_STREAMS <= 0 or not sse_stream_slots.acquire(blocking=False):
+        return jsonify({"error": "Too many status streams"}), 503, {'Retry-After': str(SSE_HEARTBEAT_INTERVAL)}
+
+    def events():
+        sent = {}
+        version = None
+        reset = True
+        last_sent = 0
+        while True:
+            with collections_changed:
+                if version == shared_store.version():
+                    collections_changed.wait(timeout=SSE_POLL_INTERVAL)
+            current_version = shared_store.version()
+            if current_version == version and time.monotonic() - last_sent < SSE_HEARTBEAT_INTERVAL:
+                continue
+            version = current_version
+            last_sent = time.monotonic()
+            current = snapshot_collections()
+            changed = {}
+            for name, collection in current.items():
+                previous = sent.get(name, {})
+                fields = {key: value for key, value in collection.items() if previous.get(key) != value}
+                if fields:
+                    changed[name] = fields
+            removed = [name for name in sent if name not in current]
+            sent = current
+            if changed or removed or reset:
+                yield f"event: update\ndata: {json.dumps({'reset': reset, 'changed': changed, 'removed': removed})}\n\n"
+                reset = False
+            else:
+                yield ": keepalive\n\n"
+
+    response = Response(
+        stream_with_context(events()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+    # Appelé par le serveur à la fermeture, même si le flux n'a jamais été lu
+    response.call_on_close(sse_stream_slots.release)
+    return response
+
+@app.route('/webhooks/radarr', methods=['POST'])
+def radarr_webhook():
+    if RADARR_WEBHOOK_TOKEN and request.args.get('token') != RADARR_WEBHOOK_TOKEN:
+        return jsonify({"error": "Invalid token"}), 403
+
+    payload = request.get_json(silent=True) or {}
+    event_type = payload.get('eventType')
+    if event_type != 'Download':
+        # "Test" depuis l'écran de Radarr, ou événement sans intérêt pour les collections
+        return jsonify({"message": f"Ignored {event_type} event"}), 200
+
+    movie = payload.get('movie') or {}
+    remote_movie = payload.get('remoteMovie') or {}
+    imdb_id = movie.get('imdbId') or remote_movie.get('imdbId')
+    tmdb_id = movie.get('tmdbId') or remote_movie.get('tmdbId')
+    if not imdb_id and tmdb_id:
+        imdb_id = next((getattr(radarr_movie, 'imdbId', None) for radarr_movie in get_radarr_movies()
+                        if getattr(radarr_movie, 'tmdbId', None) == tmdb_id), None)
+    if not imdb_id:
+        return jsonify({"message": "No IMDb ID in payload"}), 200
+
+    imdb_id = format_imdb_id(imdb_id)
+    logging.warning(f"Radarr imported {movie.get('title')} ({imdb_id})")
+    # Plex doit encore scanner le fichier : vérification des collections après un court délai
+    timer = threading.Timer(RADARR_WEBHOOK_DELAY, check_waiting_collections, kwargs={'imdb_ids': [imdb_id]})
+    timer.daemon = True
+    timer.start()
+    return jsonify({"message": "Import received", "imdb_id": imdb_id}), 202
+
 @app.route('/get_settings')
 def get_settings():
-    root_folders = [{"value": rf.path, "label": rf.path} for rf in radarr.root_folder()]
-    quality_profiles = [{"value": qp.name, "label": qp.name} for qp in radarr.quality_profile()]
-    plex_libraries = [{"value": section.title, "label": section.title} for section in plex.library.sections() if section.type == 'movie']
-    available_models = get_available_models()
+    root_folders = [{"value": path, "label": path} for path in metadata_cache.get('radarr_root_folders')]
+    quality_profiles = [{"value": qp["name"], "label": qp["name"]} for qp in metadata_cache.get('radarr_quality_profiles')]
+    plex_libraries = [{"value": title, "label": title} for title in metadata_cache.get('plex_libraries')]
+    available_models = metadata_cache.get('models')
     
     return jsonify({
         "root_folders": root_folders,
         "quality_profiles": quality_profiles,
         "plex_libraries": plex_libraries,
         "model": available_models,
-        "current_settings": SETTINGS
+        "current_settings": dict(SETTINGS),
+        "cache_age": metadata_cache.ages()
     })
 
 @app.route('/save_settings', methods=['POST'])
@@ -511,7 +1225,7 @@ def save_settings():
     if 'model' in data and not is_model_available(data['model']):
         return jsonify({"error": "Selected model is not available"}), 400
     SETTINGS.update(data)
-    write_settings_to_file(SETTINGS)
+    write_settings_to_file(dict(SETTINGS))
     return jsonify({"message": "Settings saved successfully"})
 
 @app.route('/')
@@ -531,29 +1245,36 @@ def serve_static(filename):
 class Movie(BaseModel):
     title: str
     year: int
+    id: Optional[int] = None  # id de la ligne du digest de bibliothèque, en mode 'library'
 
 class MovieList(BaseModel):
     movies: List[Movie]
 
-def get_recommendations_from_ai(theme, count, option, language, plex_movies=None):
+def build_recommendation_messages(theme, count, option, language, plex_movies=None, exclude=None):
     translations = TRANSLATIONS.get(language, TRANSLATIONS["english"]) 
     
     if option == 'library' and plex_movies:
-        prompt = translations["library_prompt"].format(movies=str(plex_movies), count=count, theme=theme)
+        prompt = translations["library_prompt"].format(movies=plex_movies["text"], count=count, theme=theme)
     else:
         prompt = translations["general_prompt"].format(count=count, theme=theme)
+    if exclude:
+        prompt += " " + translations["exclude_prompt"].format(movies="; ".join(exclude))
 
     system_message = translations["system_message"].format(
         count=count,
         schema=json.dumps(MovieList.model_json_schema(), indent=2)
     )
 
+    messages = [
+        {"role": "system", "content": system_message},
+        {"role": "user", "content": prompt}
+    ]
+    return messages, translations
+
+def get_recommendations_from_ai(theme, count, option, language, plex_movies=None, exclude=None):
+    messages, translations = build_recommendation_messages(theme, count, option, language, plex_movies, exclude)
+
     try:
-        messages = [
-            {"role": "system", "content": system_message},
-            {"role": "user", "content": prompt}
-        ]
-        
         if MODEL_SERVER == 'GROQ':
             response = ai_client.chat_completion(messages, SETTINGS['model'])
             content = json.loads(response.choices[0].message.content)
@@ -568,28 +1289,506 @@ def get_recommendations_from_ai(theme, count, option, language, plex_movies=None
         
         movie_list = MovieList.model_validate(content)
         
-        return [{"title": movie.title, "year": movie.year} for movie in movie_list.movies][:count]
+        return [movie.model_dump(exclude_none=True) for movie in movie_list.movies][:count]
     
     except Exception as e:
         error_message = translations["error_message"].format(error=str(e))
         logging.error(error_message)
         raise Exception("ai_error", str(e))
 
+def parse_movie_stream(chunks):
+    # Extrait chaque objet film dès que son accolade fermante arrive, sans attendre la fin du JSON
+    buffer = []
+    starts = []
+    in_string = False
+    escape = False
+    for chunk in chunks:
+        for char in chunk:
+            buffer.append(char)
+            if in_string:
+                if escape:
+                    escape = False
+                elif char == '\\':
+                    escape = True
+                elif char == '"':
+                    in_string = False
+            elif char == '"':
+                in_string = True
+            elif char == '{':
+                starts.append(len(buffer) - 1)
+            elif char == '}' and starts:
+                start = starts.pop()
+                try:
+                    candidate = json.loads(''.join(buffer[start:]))
+                except json.JSONDecodeError:
+                    continue
+                if isinstance(candidate, dict) and 'title' in candidate:
+                    try:
+                        movie = Movie.model_validate(candidate)
+                    except Exception:
+                        logging.warning(f"Ignoring invalid movie in AI stream: {candidate}")
+                        continue
+                    yield movie.model_dump(exclude_none=True)
+
+def stream_recommendations_from_ai(theme, count, option, language, plex_movies=None):
+    messages, translations = build_recommendation_messages(theme, count, option, language, plex_movies)
+    try:
+        yield from parse_movie_stream(ai_client.chat_completion_stream(messages, SETTINGS['model']))
+    except Exception as e:
+        error_message = translations["error_message"].format(error=str(e))
+        logging.error(error_message)
+        raise Exception("ai_error", str(e))
+
+def format_imdb_id(imdb_id):
+    # Cinemagoer renvoie "0133093", Plex et Radarr utilisent "tt0133093"
+    if not imdb_id:
+        return None
+    imdb_id = str(imdb_id).strip()
+    return imdb_id if imdb_id.startswith('tt') else f"tt{imdb_id}"
+
+def parse_guid(guid_id):
+    # 'imdb://tt0133093', 'tmdb://603', 'com.plexapp.agents.imdb://tt0133093?lang=en'
+    match = re.match(r'^(?:com\.plexapp\.agents\.)?(\w+)://([^?]+)', guid_id or '')
+    if not match:
+        return None
+    source, value = match.groups()
+    source = {'themoviedb': 'tmdb', 'thetvdb': 'tvdb'}.get(source, source)
+    if source not in ('imdb', 'tmdb', 'tvdb'):
+        return None
+    return source, value
+
+class PlexLibraryIndex:
+    def __init__(self, section_title):
+        self.section_title = section_title
+        self.lock = threading.RLock()
+        self.build_lock = threading.Lock()
+        self.items = {}      # ratingKey -> {"title", "year", "guids", "summary", "genres"}
+        self.by_guid = {}    # ("imdb", "tt0133093") -> ratingKey
+        self.by_title = {}   # (titre normalisé, année ou None) -> set(ratingKey)
+        self.fuzzy_titles = TitleTrigramIndex(FUZZY_MATCH_THRESHOLD)  # titres et titres originaux
+        self.built_at = None
+        self.high_water = 0  # plus grand addedAt/updatedAt vu, en secondes epoch
+        self.version = 0
+        self.refreshed_at = 0
+        self.reconciled_at = 0
+
+    def build(self):
+        section = plex.library.section(self.section_title)
+        # Un seul appel pour toute la section, GUIDs inclus
+        movies = section.all(includeGuids=True)
+        with self.lock:
+            self.items = {}
+            self.by_guid = {}
+            self.by_title = {}
+            self.fuzzy_titles = TitleTrigramIndex(FUZZY_MATCH_THRESHOLD)
+            self.high_water = 0
+            for movie in movies:
+                self._add(movie)
+            self.built_at = time.time()
+            self.refreshed_at = self.built_at
+            self.version += 1
+        logging.warning(f"Plex index built for '{self.section_title}': {len(self.items)} movies")
+
+    def ensure_built(self):
+        if self.built_at is not None:
+            return
+        with self.build_lock:
+            if self.built_at is None:
+                self.build()
+
+    def refresh(self):
+        # Ne récupère que les films ajoutés/modifiés depuis le dernier passage
+        if self.built_at is None:
+            self.ensure_built()
+            return []
+        with self.build_lock:
+            section = plex.library.section(self.section_title)
+            # Marge d'une seconde : le filtre Plex ">>=" est strict sur updatedAt
+            since = max(int(self.high_water) - 1, 0)
+            try:
+                movies = plex.fetchItems(
+                    f"/library/sections/{section.key}/all?type=1&includeGuids=1&updatedAt>>={since}"
+                )
+            except Exception as e:
+                logging.error(f"Delta refresh failed for '{self.section_title}', rebuilding: {str(e)}")
+                self.build()
+                return []
+            changed = []
+            with self.lock:
+                for movie in movies:
+                    rating_key = str(movie.ratingKey)
+                    previous = self.items.get(rating_key)
+                    self._remove(rating_key)
+                    self._add(movie)
+                    if previous != self.items[rating_key]:
+                        changed.append(rating_key)
+                if changed:
+                    self.version += 1
+                self.refreshed_at = time.time()
+            if changed:
+                logging.warning(f"Plex index for '{self.section_title}': {len(changed)} movies added or updated")
+            return changed
+
+    def stamp(self):
+        with self.lock:
+            return f"{int(self.high_water)}:{len(self.items)}"
+
+    def reconcile(self):
+        # Détection des suppressions : on compare le total Plex et, s'il diffère, la liste des ratingKeys
+        if self.built_at is None:
+            return []
+        self.reconciled_at = time.time()
+        section = plex.library.section(self.section_title)
+        container = plex.query(
+            f"/library/sections/{section.key}/all?type=1",
+            headers={'X-Plex-Container-Start': '0', 'X-Plex-Container-Size': '0'}
+        )
+        with self.lock:
+            if int(container.attrib.get('totalSize', -1)) == len(self.items):
+                return []
+        data = plex.query(f"/library/sections/{section.key}/all?type=1&includeGuids=0")
+        live_keys = {element.attrib.get('ratingKey') for element in data}
+        with self.lock:
+            removed = [self.items[rating_key] for rating_key in self.items if rating_key not in live_keys]
+            for rating_key in [rating_key for rating_key in self.items if rating_key not in live_keys]:
+                self._remove(rating_key)
+            if removed:
+                self.version += 1
+        if removed:
+            logging.warning(f"Plex index for '{self.section_title}': {len(removed)} movies removed")
+        return removed
+
+    def _add(self, movie):
+        rating_key = str(movie.ratingKey)
+        guids = {}
+        # Lecture directe des balises Guid : movie.guids recharge l'objet partiel quand la liste est vide
+        guid_ids = [movie.guid] + [g.attrib.get('id') for g in movie._data.findall('Guid')]
+        for guid in guid_ids:
+            parsed = parse_guid(guid)
+            if parsed:
+                guids[parsed[0]] = parsed[1]
+        year = str(movie.year) if movie.year else None
+        self.items[rating_key] = {
+            "title": movie.title,
+            "original_title": movie._data.attrib.get('originalTitle'),
+            "year": year,
+            "guids": guids,
+            "summary": movie.summary or '',
+            "genres": [genre.attrib.get('tag') for genre in movie._data.findall('Genre')]
+        }
+        for source, value in guids.items():
+            self.by_guid[(source, value)] = rating_key
+        titles = self._title_variants(self.items[rating_key])
+        for title in titles:
+            self.by_title.setdefault((title, year), set()).add(rating_key)
+            self.by_title.setdefault((title, None), set()).add(rating_key)
+        self.fuzzy_titles.add(rating_key, titles, year)
+        for timestamp in (movie.addedAt, movie.updatedAt):
+            if timestamp:
+                self.high_water = max(self.high_water, timestamp.timestamp())
+
+    def _remove(self, rating_key):
+        item = self.items.pop(rating_key, None)
+        if not item:
+            return
+        for source, value in item["guids"].items():
+            if self.by_guid.get((source, value)) == rating_key:
+                del self.by_guid[(source, value)]
+        titles = self._title_variants(item)
+        for title in titles:
+            for key in ((title, item["year"]), (title, None)):
+                rating_keys = self.by_title.get(key)
+                if rating_keys:
+                    rating_keys.discard(rating_key)
+                    if not rating_keys:
+                        del self.by_title[key]
+        self.fuzzy_titles.remove(rating_key, titles)
+
+    @staticmethod
+    def _title_variants(item):
+        return {normalize_title(title) for title in (item["title"], item.get("original_title")) if title}
+
+    def find_by_guid(self, source, value):
+        with self.lock:
+            return self.by_guid.get((source, str(value)))
+
+    def find_by_imdb(self, imdb_id):
+        imdb_id = format_imdb_id(imdb_id)
+        if not imdb_id:
+            return None
+        return self.find_by_guid('imdb', imdb_id)
+
+    def find_by_title(self, title, year=None):
+        key = (normalize_title(title), str(year) if year else None)
+        with self.lock:
+            rating_keys = self.by_title.get(key)
+            return next(iter(rating_keys)) if rating_keys else None
+
+    def fuzzy_find(self, title, year=None):
+        with self.lock:
+            return self.fuzzy_titles.find(title, year)
+
+    def find_many_by_title(self, movies):
+        # Un seul verrou pour toute la liste de (titre, année)
+        keys = [(normalize_title(title), str(year) if year else None) for title, year in movies]
+        with self.lock:
+            return [next(iter(self.by_title[key])) if self.by_title.get(key) else None for key in keys]
+
+    def get(self, rating_key):
+        with self.lock:
+            return self.items.get(str(rating_key))
+
+    def fetch(self, rating_key):
+        return plex.fetchItem(int(rating_key))
+
+def tokenize(text):
+    text = unicodedata.normalize('NFKD', text.lower())
+    text = ''.join(char for char in text if not unicodedata.combining(char))
+    return re.findall(r'\w{3,}', text)
+
+class LibraryVectorIndex:
+    # Matrice NumPy (un film par ligne) sur titres, genres et résumés, sauvegardée sur disque
+    def __init__(self, path, dimensions, embedding_model):
+        self.path = path
+        self.dimensions = dimensions
+        self.embedding_model = embedding_model if MODEL_SERVER == 'OLLAMA' else ''
+        if embedding_model and not self.embedding_model:
+            logging.warning("EMBEDDING_MODEL needs MODEL_SERVER=OLLAMA, using hashed vectors instead")
+        self.mode = f"ollama:{self.embedding_model}" if self.embedding_model else f"hash:{dimensions}"
+        self.lock = threading.Lock()
+        self.index_version = None
+        self.fingerprint = None
+        self.rating_keys = []
+        self.doc_hashes = np.zeros(0, dtype=np.int64)
+        self.matrix = None
+        self.idf = None
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with np.load(self.path, allow_pickle=False) as data:
+                if str(data['mode'][0]) != self.mode:
+                    return
+                self.rating_keys = [str(key) for key in data['rating_keys']]
+                self.doc_hashes = data['doc_hashes']
+                self.matrix = data['matrix']
+                self.idf = data['idf']
+                self.fingerprint = int(data['fingerprint'][0])
+            logging.warning(f"Loaded library vectors from {self.path}: {len(self.rating_keys)} movies")
+        except Exception as e:
+            logging.error(f"Error loading library vectors: {str(e)}")
+
+    def _save(self):
+        np.savez(
+            self.path,
+            mode=np.array([self.mode]),
+            rating_keys=np.array(self.rating_keys),
+            doc_hashes=self.doc_hashes,
+            matrix=self.matrix,
+            idf=self.idf,
+            fingerprint=np.array([self.fingerprint], dtype=np.int64)
+        )
+
+    @staticmethod
+    def document(item):
+        # Titre et genres comptent double face au résumé
+        return ' '.join([item['title']] * 2 + item.get('genres', []) * 2 + [item.get('summary', '')])
+
+    def _hashed(self, text):
+        vector = np.zeros(self.dimensions, dtype=np.float32)
+        for token in tokenize(text):
+            vector[zlib.crc32(token.encode()) % self.dimensions] += 1
+        return np.log1p(vector)
+
+    def _embed(self, text):
+        response = ai_client.client.embeddings(model=self.embedding_model, prompt=text)
+        return np.array(response['embedding'], dtype=np.float32)
+
+    def refresh(self, index):
+        version = (index.section_title, index.version)
+        if version == self.index_version:
+            return
+        with self.lock:
+            if version == self.index_version:
+                return
+            with index.lock:
+                documents = {rating_key: self.document(item) for rating_key, item in index.items.items()}
+            rating_keys = sorted(documents)
+            doc_hashes = np.array([zlib.crc32(documents[key].encode()) for key in rating_keys], dtype=np.int64)
+            fingerprint = zlib.crc32(repr((rating_keys, doc_hashes.tolist())).encode())
+            if fingerprint != self.fingerprint:
+                if self.embedding_model:
+                    # Les embeddings déjà calculés pour un film inchangé sont réutilisés
+                    previous = {(key, int(doc_hash)): row for key, doc_hash, row in zip(self.rating_keys, self.doc_hashes, self.matrix if self.matrix is not None else [])}
+                    rows = [previous.get((key, int(doc_hash))) for key, doc_hash in zip(rating_keys, doc_hashes)]
+                    rows = [row if row is not None else self._embed(documents[key]) for key, row in zip(rating_keys, rows)]
+                    matrix = np.vstack(rows) if rows else np.zeros((0, 1), dtype=np.float32)
+                    idf = np.ones(matrix.shape[1], dtype=np.float32)
+                else:
+                    matrix = np.vstack([self._hashed(documents[key]) for key in rating_keys]) if rating_keys else np.zeros((0, self.dimensions), dtype=np.float32)
+                    document_frequency = (matrix > 0).sum(axis=0)
+                    idf = (np.log((len(rating_keys) + 1) / (document_frequency + 1)) + 1).astype(np.float32)
+                    matrix = matrix * idf
+                norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+                self.matrix = (matrix / np.where(norms == 0, 1, norms)).astype(np.float32)
+                self.idf = idf
+                self.rating_keys = rating_keys
+                self.doc_hashes = doc_hashes
+                self.fingerprint = fingerprint
+                self._save()
+                logging.warning(f"Library vectors rebuilt ({self.mode}): {len(rating_keys)} movies")
+            self.index_version = version
+
+    def search(self, index, query, top_k):
+        self.refresh(index)
+        with self.lock:
+            if self.matrix is None or not len(self.rating_keys):
+                return []
+            vector = self._embed(query) if self.embedding_model else self._hashed(query) * self.idf
+            norm = np.linalg.norm(vector)
+            if norm == 0:
+                return []
+            scores = self.matrix @ (vector / norm)
+            top_k = min(top_k, len(scores))
+            best = np.argpartition(-scores, top_k - 1)[:top_k]
+            best = best[np.argsort(-scores[best])]
+            return [self.rating_keys[i] for i in best if scores[i] > 0]
+
+library_vectors = LibraryVectorIndex(VECTOR_INDEX_FILE, VECTOR_DIMENSIONS, EMBEDDING_MODEL)
+
+plex_indexes = {}
+plex_indexes_lock = threading.Lock()
+
+def get_plex_index():
+    section_title = SETTINGS['plex_library']
+    with plex_indexes_lock:
+        index = plex_indexes.get(section_title)
+        if index is None:
+            index = PlexLibraryIndex(section_title)
+            plex_indexes[section_title] = index
+    index.ensure_built()
+    # Hors worker propriétaire du scheduler, personne ne rafraîchit l'index : delta en tâche de fond
+    if time.time() - index.refreshed_at > PLEX_INDEX_REFRESH_INTERVAL and not index.build_lock.locked():
+        index.refreshed_at = time.time()
+        threading.Thread(target=refresh_stale_plex_index, args=(index,), daemon=True).start()
+    return index
+
+def refresh_stale_plex_index(index):
+    refresh_plex_index()
+    if time.time() - index.reconciled_at > PLEX_INDEX_RECONCILE_INTERVAL:
+        reconcile_plex_index()
+
+def refresh_plex_index():
+    try:
+        index = get_plex_index()
+        changed = [index.get(rating_key) for rating_key in index.refresh()]
+        changed = [item for item in changed if item]
+        if changed:
+            invalidation_bus.publish(
+                'plex_item_added',
+                imdb_ids=[item['guids'].get('imdb') for item in changed],
+                titles=[item['title'] for item in changed]
+            )
+        # Recalcul des vecteurs en tâche de fond, une fois qu'une recherche les a utilisés
+        if library_vectors.index_version is not None:
+            library_vectors.refresh(index)
+    except Exception as e:
+        logging.error(f"Error refreshing Plex index: {str(e)}")
+
+def reconcile_plex_index():
+    try:
+        removed = get_plex_index().reconcile()
+        if removed:
+            invalidation_bus.publish(
+                'plex_item_removed',
+                imdb_ids=[item['guids'].get('imdb') for item in removed],
+                titles=[item['title'] for item in removed]
+            )
+    except Exception as e:
+        logging.error(f"Error reconciling Plex index: {str(e)}")
+
 def get_all_plex_movies():
     try:
-        plex_movies = plex.library.section(SETTINGS['plex_library'])
-        return [{"title": movie.title, "year": movie.year} for movie in plex_movies.all()]
+        index = get_plex_index()
+        with index.lock:
+            return [{"title": item["title"], "year": item["year"]} for item in index.items.values()]
     except Exception as e:
         logging.error(f"Error fetching Plex movies: {str(e)}")
         return []
     
+library_digests = {}
+library_digests_lock = threading.Lock()
+
+def get_library_digest():
+    # Une ligne "id|titre|année" par film, sans doublons ; recalculé seulement quand l'index change
+    index = get_plex_index()
+    version = (index.section_title, index.version)
+    with library_digests_lock:
+        digest = library_digests.get(version)
+        if digest:
+            return digest
+    with index.lock:
+        entries = {}
+        for rating_key, item in index.items.items():
+            entries.setdefault((item["title"], item["year"] or ''), rating_key)
+    digest = build_library_digest(index, [rating_key for _, rating_key in sorted(entries.items())])
+    with library_digests_lock:
+        library_digests.clear()
+        library_digests[version] = digest
+    logging.warning(f"Library digest built: {len(digest['rating_keys'])} movies, {len(digest['text'])} characters")
+    return digest
+
+def build_library_digest(index, rating_keys):
+    rating_key_by_id = {}
+    lines = []
+    for movie_id, rating_key in enumerate(rating_keys, start=1):
+        item = index.get(rating_key)
+        if not item:
+            continue
+        rating_key_by_id[movie_id] = rating_key
+        lines.append(f"{movie_id}|{item['title'].replace('|', '/')}|{item['year'] or ''}")
+    return {"text": "\n".join(lines), "rating_keys": rating_key_by_id}
+
+def get_library_shortlist_digest(theme, count):
+    # Seuls les films les plus proches du thème partent dans le prompt
+    index = get_plex_index()
+    target = max(LIBRARY_SHORTLIST_SIZE, count * 3)
+    with index.lock:
+        library_keys = list(index.items)
+    # Bibliothèque à peine plus grande que la shortlist : autant tout envoyer
+    if len(library_keys) <= target:
+        return get_library_digest()
+    try:
+        rating_keys = library_vectors.search(index, theme, target)
+    except Exception as e:
+        logging.error(f"Error searching the library vector index: {str(e)}")
+        rating_keys = []
+    if not rating_keys:
+        return get_library_digest()
+    logging.warning(f"Library shortlist for '{theme}': {len(rating_keys)} candidates")
+    # Peu de films proches du thème : on complète avec le reste de la bibliothèque pour pouvoir remplir count
+    if len(rating_keys) < target:
+        chosen = set(rating_keys)
+        rating_keys = rating_keys + [rating_key for rating_key in library_keys if rating_key not in chosen][:target - len(rating_keys)]
+    return build_library_digest(index, rating_keys)
+
+def apply_library_ids(movies, digest):
+    # Remplace titre et année par ceux de Plex quand le modèle a renvoyé un id du digest
+    index = get_plex_index()
+    for movie in movies:
+        rating_key = digest["rating_keys"].get(movie.pop('id', None))
+        item = index.get(rating_key) if rating_key else None
+        if item:
+            movie['title'] = item['title']
+            if item['year']:
+                movie['year'] = int(item['year'])
+    return movies
+
 def movie_in_library(title, imdb_id):
     try:
-        plex_movies = plex.library.section(SETTINGS['plex_library'])
-        for movie in plex_movies.search(title=title):
-            if any(guid.id == f'imdb://tt{imdb_id}' for guid in movie.guids):
-                return True
-        return False
+        return get_plex_index().find_by_imdb(imdb_id) is not None
     except Exception as e:
         logging.error(f"Error checking if movie is in library: {str(e)}")
         return False
@@ -605,7 +1804,7 @@ def create_plex_collection(collection_name, movies):
         new_library = get_first_movie_library()
         if new_library:
             SETTINGS['plex_library'] = new_library
-            write_settings_to_file(SETTINGS)
+            write_settings_to_file(dict(SETTINGS))
             plex_movies = plex.library.section(SETTINGS['plex_library'])
         else:
             logging.error("No movie library found in Plex.")
@@ -618,96 +1817,434 @@ def create_plex_collection(collection_name, movies):
         else:
             logging.warning(f"Movie '{movie_title}' not found in Plex library.")
 
-from concurrent.futures import ThreadPoolExecutor
-
 def is_movie_in_plex(movie_title, imdb_id):
-    plex_movies = plex.library.section(SETTINGS['plex_library'])
+    index = get_plex_index()
 
-    # Nettoyage du titre
-    stripped_title = re.sub(r'\s*\(.*?\)\s*', '', movie_title).strip()
-    logging.warning(f"Stripped title for search: {stripped_title}")
+    if imdb_id:
+        rating_key = index.find_by_imdb(imdb_id)
+    else:
+        # Sans IMDb ID, on se rabat sur le titre et l'année
+        title, year = parse_movie_title(movie_title)
+        rating_key = index.find_by_title(title, year)
 
-    # Recherche avec le titre nettoyé
-    results = plex_movies.search(title=stripped_title)
-    logging.warning(f"Search results: {results}")
+    if rating_key:
+        logging.info(f"Found movie in Plex: {index.get(rating_key)['title']} (IMDb ID {imdb_id})")
+        return True
 
-    # Vérification des résultats de la recherche
-    for movie in results:
-        logging.warning(f"Plex title: {movie.title}")
-        for movie_guid in movie.guids:
-            logging.warning(f"GUID found: {movie_guid.id}")
-            if movie_guid.id == f'imdb://tt{imdb_id}':
-                logging.info(f"Found movie in Plex: {movie.title} with matching IMDb ID")
-                return True
-
-    # Si la recherche par titre n'a pas fonctionné, on parcourt tous les films
-    logging.warning(f"No matching title found, searching all movies for IMDb ID {imdb_id}")
-    all_movies = get_all_plex_movies()
-    
-    for movie in all_movies:
-        results = plex_movies.search(title=movie["title"])
-        for result in results:
-            for movie_guid in result.guids:
-                if movie_guid.id == f'imdb://tt{imdb_id}':
-                    logging.info(f"Found movie in Plex: {result.title} with matching IMDb ID")
-                    return True
-
-    logging.warning(f"Movie with IMDb ID {imdb_id} not found in Plex")
+    logging.warning(f"Movie '{movie_title}' with IMDb ID {imdb_id} not found in Plex")
     return False
 
 def add_missing_movies_to_radarr(movies):
+    if not movies:
+        return []
+    imdb_ids = resolve_imdb_ids(movies)
+    # Un seul appel pour savoir ce que Radarr possède déjà
+    existing = {format_imdb_id(m.imdbId): m for m in get_radarr_movies(refresh=True) if getattr(m, 'imdbId', None)}
+
     added_to_radarr = []
+    to_import = {}
     for movie_title in movies:
-        imdb_id = get_imdb_id(movie_title)
-        if imdb_id:
-            radarr_movies = radarr.search_movies(imdb_id)
-            if radarr_movies:
-                radarr_movie = radarr_movies[0]
-                if not radarr_movie.monitored:
+        imdb_id = imdb_ids.get(movie_title)
+        if not imdb_id:
+            logging.warning(f"Couldn't find IMDb ID for {movie_title}")
+            continue
+        radarr_movie = existing.get(imdb_id)
+        if radarr_movie:
+            if not radarr_movie.monitored:
+                try:
                     radarr_movie.edit(monitored=True)
                     logging.info(f"Movie {movie_title} already in Radarr. Set to monitored.")
-                added_to_radarr.append(movie_title)
-                requests.post('http://localhost:9999/clear_cache')
-            else:
-                try:
-                    new_movie = radarr.add_movie(
-                        imdb_id = imdb_id,
-                        root_folder = SETTINGS['root_folder'],
-                        quality_profile = SETTINGS['quality_profile']
-                    )
-                    added_to_radarr.append(movie_title)
-                    logging.info(f"Added {movie_title} to Radarr")
                 except Exception as e:
-                    logging.error(f"Error adding {movie_title} to Radarr: {str(e)}")
+                    logging.error(f"Error monitoring {movie_title} in Radarr: {str(e)}")
+            added_to_radarr.append(movie_title)
         else:
-            logging.warning(f"Couldn't find IMDb ID for {movie_title}")
+            to_import.setdefault(imdb_id, movie_title)
+
+    if to_import:
+        added_to_radarr.extend(import_movies_to_radarr(to_import))
+        get_radarr_movies(refresh=True)
+    invalidation_bus.publish(
+        'radarr_added',
+        imdb_ids=[imdb_ids.get(movie_title) for movie_title in added_to_radarr],
+        titles=added_to_radarr
+    )
     return added_to_radarr
 
+def import_movies_to_radarr(to_import):
+    # to_import : {IMDb ID: titre}. Import groupé de Radarr, sinon ajouts en parallèle
+    try:
+        result = radarr.add_multiple_movies(
+            list(to_import),
+            root_folder=SETTINGS['root_folder'],
+            quality_profile=SETTINGS['quality_profile']
+        )
+        added, exists, invalid = result[0], result[1], result[2]
+        imported = [to_import[format_imdb_id(m.imdbId)] for m in added + exists if format_imdb_id(m.imdbId) in to_import]
+        for imdb_id in invalid:
+            logging.error(f"Radarr rejected {to_import.get(str(imdb_id), imdb_id)} ({imdb_id})")
+        logging.info(f"Bulk import to Radarr: {len(added)} added, {len(exists)} already present, {len(invalid)} invalid")
+        return imported
+    except Exception as e:
+        logging.error(f"Bulk import to Radarr failed, adding movies one by one: {str(e)}")
+
+    def add(item):
+        imdb_id, movie_title = item
+        try:
+            radarr.add_movie(
+                imdb_id = imdb_id,
+                root_folder = SETTINGS['root_folder'],
+                quality_profile = SETTINGS['quality_profile']
+            )
+            logging.info(f"Added {movie_title} to Radarr")
+            return movie_title
+        except Exception as e:
+            logging.error(f"Error adding {movie_title} to Radarr: {str(e)}")
+            return None
+
+    with ThreadPoolExecutor(max_workers=RADARR_LOOKUP_WORKERS) as executor:
+        return [movie_title for movie_title in executor.map(add, to_import.items()) if movie_title]
+
+class ImdbIdCache:
+    # Cache titre -> IMDb ID : LRU en mémoire devant une table SQLite qui survit aux redémarrages
+    def __init__(self, path, ttl, negative_ttl, max_entries):
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        self.memory = LRUCache(maxsize=min(max_entries, 5000))
+        self.touched = set()
+        self.writes = 0
+        self.db = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        # WAL : plusieurs workers lisent et écrivent le même fichier
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS imdb_ids ("
+            "key TEXT PRIMARY KEY, imdb_id TEXT, expires_at REAL, last_used REAL)"
+        )
+        self.db.execute("CREATE INDEX IF NOT EXISTS imdb_ids_last_used ON imdb_ids (last_used)")
+        self.db.commit()
+
+    @staticmethod
+    def make_key(title):
+        # "Matrix, The (1999)" et "the matrix (1999)" partagent la même entrée
+        title, year = parse_movie_title(title)
+        title = normalize_title(title)
+        return f"{title} ({year})" if year else title
+
+    def get(self, title):
+        key = self.make_key(title)
+        now = time.time()
+        with self.lock:
+            entry = self.memory.get(key)
+            if entry is None:
+                row = self.db.execute(
+                    "SELECT imdb_id, expires_at FROM imdb_ids WHERE key = ?", (key,)
+                ).fetchone()
+                if row is None:
+                    return False, None
+                entry = (row[0], row[1])
+                self.memory[key] = entry
+            if entry[1] < now:
+                del self.memory[key]
+                return False, None
+            self.touched.add(key)
+            return True, entry[0]
+
+    def set(self, title, imdb_id):
+        key = self.make_key(title)
+        now = time.time()
+        expires_at = now + (self.ttl if imdb_id else self.negative_ttl)
+        with self.lock:
+            self.memory[key] = (imdb_id, expires_at)
+            self.db.execute(
+                "INSERT OR REPLACE INTO imdb_ids (key, imdb_id, expires_at, last_used) VALUES (?, ?, ?, ?)",
+                (key, imdb_id, expires_at, now)
+            )
+            self.writes += 1
+            if self.writes % 100 == 0:
+                self._evict(now)
+            self.db.commit()
+
+    def _evict(self, now):
+        # Report des accès mémoire avant de supprimer les entrées expirées puis les moins récemment utilisées
+        self.db.executemany(
+            "UPDATE imdb_ids SET last_used = ? WHERE key = ?", [(now, key) for key in self.touched]
+        )
+        self.touched.clear()
+        self.db.execute("DELETE FROM imdb_ids WHERE expires_at < ?", (now,))
+        self.db.execute(
+            "DELETE FROM imdb_ids WHERE key IN ("
+            "SELECT key FROM imdb_ids ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,)
+        )
+
+imdb_id_cache = ImdbIdCache(IMDB_CACHE_FILE, IMDB_CACHE_TTL, IMDB_CACHE_NEGATIVE_TTL, IMDB_CACHE_MAX_ENTRIES)
+
 def get_imdb_id(title):
-    ia = Cinemagoer()
-
-    # Recherche de tous les titres correspondants
-    search_results = ia.search_movie(title)
-    if search_results:
-        for result in search_results:
-            logging.warning(f"{title} :  {result['kind']}")
-            if result['kind'] == 'movie':  # Filtrer pour ne garder que les films
-                imdb_id = result.movieID
-                logging.warning(f"Found IMDb ID for movie {title}: {imdb_id}")
-                time.sleep(0.5)
-                return imdb_id
-        
-        logging.warning(f"No IMDb ID found for a movie titled {title}.")
-        return None
-    else:
-        logging.warning(f"No results found for {title}.")
+    found, imdb_id = imdb_id_cache.get(title)
+    if found:
+        return format_imdb_id(imdb_id)
+    imdb_id = format_imdb_id(search_imdb_id(title))
+    imdb_id_cache.set(title, imdb_id)
+    return imdb_id
+
+class MetadataCache:
+    # Sert la dernière valeur connue tout de suite et la rafraîchit en arrière-plan quand elle est trop vieille
+    def __init__(self):
+        self.loaders = {}
+        self.entries = {}  # nom -> (valeur, date de récupération)
+        self.refreshing = set()
+        self.lock = threading.Lock()
+
+    def register(self, name, loader, max_age=METADATA_MAX_AGE):
+        self.loaders[name] = (loader, max_age)
+
+    def get(self, name):
+        entry = self.entries.get(name)
+        if entry is None:
+            return self.refresh(name)
+        if time.time() - entry[1] >= self.loaders[name][1]:
+            self._refresh_in_background(name)
+        return entry[0]
+
+    def refresh(self, name):
+        loader, _ = self.loaders[name]
+        try:
+            value = loader()
+        except Exception as e:
+            logging.error(f"Error refreshing {name}: {str(e)}")
+            if name in self.entries:
+                return self.entries[name][0]
+            raise
+        self.entries[name] = (value, time.time())
+        return value
+
+    def _refresh_in_background(self, name):
+        with self.lock:
+            if name in self.refreshing:
+                return
+            self.refreshing.add(name)
+
+        def run():
+            try:
+                self.refresh(name)
+            except Exception:
+                pass
+            finally:
+                with self.lock:
+                    self.refreshing.discard(name)
+
+        threading.Thread(target=run, daemon=True).start()
+
+    def refresh_all(self):
+        # Chaque entrée selon son propre max_age ; 5 s de marge pour ne pas rater le passage de la tâche
+        now = time.time()
+        for name, (_, max_age) in list(self.loaders.items()):
+            entry = self.entries.get(name)
+            if entry is not None and now - entry[1] < max_age - 5:
+                continue
+            try:
+                self.refresh(name)
+            except Exception:
+                pass
+
+    def ages(self):
+        now = time.time()
+        return {name: round(now - fetched_at) for name, (_, fetched_at) in self.entries.items()}
+
+metadata_cache = MetadataCache()
+
+def load_radarr_movies():
+    movies = radarr.all_movies()
+    by_title = {}
+    for movie in movies:
+        imdb_id = getattr(movie, 'imdbId', None)
+        if not imdb_id:
+            continue
+        for title in (movie.title, getattr(movie, 'originalTitle', None)):
+            if title:
+                by_title[(normalize_title(title), str(movie.year))] = imdb_id
+    return {"movies": movies, "by_title": by_title}
+
+metadata_cache.register('radarr_root_folders', lambda: [rf.path for rf in radarr.root_folder()])
+metadata_cache.register('radarr_quality_profiles', lambda: [{"id": qp.id, "name": qp.name} for qp in radarr.quality_profile()])
+metadata_cache.register('radarr_movies', load_radarr_movies, max_age=RADARR_MOVIES_TTL)
+metadata_cache.register('plex_libraries', lambda: [section.title for section in plex.library.sections() if section.type == 'movie'])
+metadata_cache.register('models', lambda: get_available_models())
+
+def get_radarr_movies(refresh=False):
+    # Liste complète des films Radarr, récupérée en un seul appel
+    try:
+        if refresh:
+            return metadata_cache.refresh('radarr_movies')["movies"]
+        return metadata_cache.get('radarr_movies')["movies"]
+    except Exception:
+        return []
+
+def get_radarr_movies_by_title():
+    # Films déjà connus de Radarr, indexés par (titre normalisé, année)
+    try:
+        return metadata_cache.get('radarr_movies')["by_title"]
+    except Exception:
+        return {}
+
+def resolve_imdb_id_locally(title):
+    movie_title, year = parse_movie_title(title)
+    try:
+        index = get_plex_index()
+        rating_key = index.find_by_title(movie_title, year)
+        if rating_key and index.get(rating_key)["guids"].get('imdb'):
+            return index.get(rating_key)["guids"]['imdb']
+    except Exception as e:
+        logging.error(f"Error resolving {title} from the Plex index: {str(e)}")
+    return get_radarr_movies_by_title().get((normalize_title(movie_title), year))
+
+def lookup_imdb_id_in_radarr(title):
+    movie_title, year = parse_movie_title(title)
+    normalized = normalize_title(movie_title)
+    try:
+        candidates = radarr.search_movies(movie_title)
+    except Exception as e:
+        logging.error(f"Error looking up {title} in Radarr: {str(e)}")
         return None
+    matches = [m for m in candidates if getattr(m, 'imdbId', None) and (not year or str(m.year) == year)]
+    exact = [m for m in matches if normalize_title(m.title) == normalized]
+    best = (exact or matches or [None])[0]
+    return best.imdbId if best else None
+
+def resolve_imdb_ids(titles):
+    # Cache local, index Plex, films Radarr, recherche Radarr groupée, puis Cinemagoer en dernier recours
+    resolved = {}
+    pending = []
+    for title in dict.fromkeys(titles):
+        found, imdb_id = imdb_id_cache.get(title)
+        if not imdb_id:
+            imdb_id = resolve_imdb_id_locally(title)
+        if imdb_id:
+            resolved[title] = format_imdb_id(imdb_id)
+        elif found:
+            resolved[title] = None  # échec récent mis en cache, inutile de réinterroger
+        else:
+            pending.append(title)
+
+    if pending:
+        with ThreadPoolExecutor(max_workers=RADARR_LOOKUP_WORKERS) as executor:
+            looked_up = dict(zip(pending, executor.map(lookup_imdb_id_in_radarr, pending)))
+        remaining = []
+        for title, imdb_id in looked_up.items():
+            if imdb_id:
+                resolved[title] = format_imdb_id(imdb_id)
+                imdb_id_cache.set(title, resolved[title])
+            else:
+                remaining.append(title)
+        # Le débit vers IMDb est réglé par imdb_gateway, pas par le nombre de titres
+        futures = {title: imdb_gateway.submit(title) for title in remaining}
+        for title, future in futures.items():
+            try:
+                imdb_id = format_imdb_id(future.result())
+            except Exception as e:
+                logging.error(f"Error searching IMDb for {title}: {str(e)}")
+                resolved[title] = None
+                continue
+            imdb_id_cache.set(title, imdb_id)
+            resolved[title] = imdb_id
+
+    logging.warning(f"Resolved {len([i for i in resolved.values() if i])}/{len(resolved)} IMDb IDs, {len(pending)} needed a remote lookup")
+    return resolved
+
+def resolve_imdb_id(title):
+    return resolve_imdb_ids([title]).get(title)
+
+class TokenBucket:
+    def __init__(self, rate, capacity=1):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+                self.updated_at = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+class ImdbGateway:
+    # Accès IMDb partagé par tout le process : file bornée, débit global, une instance Cinemagoer par worker
+    def __init__(self, rate, workers, queue_size):
+        self.bucket = TokenBucket(rate)
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.pending = {}
+        self.lock = threading.Lock()
+        for i in range(workers):
+            threading.Thread(target=self._worker, name=f"imdb-worker-{i}", daemon=True).start()
+
+    def submit(self, title):
+        # Un même titre demandé en parallèle ne part qu'une fois
+        with self.lock:
+            future = self.pending.get(title)
+            if future is not None:
+                return future
+            future = Future()
+            self.pending[title] = future
+        self.queue.put((title, future))
+        return future
+
+    def search_movie_id(self, title):
+        return self.submit(title).result()
+
+    def _worker(self):
+        ia = Cinemagoer()
+        while True:
+            title, future = self.queue.get()
+            try:
+                self.bucket.acquire()
+                future.set_result(self._search(ia, title))
+            except Exception as e:
+                future.set_exception(e)
+            finally:
+                with self.lock:
+                    self.pending.pop(title, None)
+                self.queue.task_done()
+
+    def _search(self, ia, title):
+        # Recherche de tous les titres correspondants
+        search_results = ia.search_movie(title)
+        if search_results:
+            for result in search_results:
+                logging.warning(f"{title} :  {result['kind']}")
+                if result['kind'] == 'movie':  # Filtrer pour ne garder que les films
+                    imdb_id = result.movieID
+                    logging.warning(f"Found IMDb ID for movie {title}: {imdb_id}")
+                    return imdb_id
+
+            logging.warning(f"No IMDb ID found for a movie titled {title}.")
+            return None
+        else:
+            logging.warning(f"No results found for {title}.")
+            return None
+
+imdb_gateway = ImdbGateway(IMDB_REQUESTS_PER_SECOND, IMDB_WORKERS, IMDB_QUEUE_SIZE)
+
+def search_imdb_id(title):
+    return imdb_gateway.search_movie_id(title)
 
 def get_quality_profile_id(profile_name):
-    profiles = radarr.quality_profile()
-    for profile in profiles:
-        if profile.name.lower() == profile_name.lower():
-            return profile.id
+    # Profil inconnu du cache : il vient peut-être d'être créé, on recharge une fois
+    for refresh in (False, True):
+        if refresh:
+            profiles = metadata_cache.refresh('radarr_quality_profiles')
+        else:
+            profiles = metadata_cache.get('radarr_quality_profiles')
+        for profile in profiles:
+            if profile["name"].lower() == profile_name.lower():
+                return profile["id"]
     raise ValueError(f"Quality profile not found: {profile_name}")
 
 def add_letterboxd_collection(url, name):
@@ -720,138 +2257,249 @@ def add_letterboxd_collection(url, name):
             'last_updated': datetime.now(TIMEZONE).isoformat(),
             'is_letterboxd': True
         }
+        notify_collections_changed()
         logging.warning(f"Added Letterboxd collection: {name} with {len(movies)} movies")
     except Exception as e:
         logging.warning(f"Error in add_letterboxd_collection: {str(e)}")
         raise
 
-def schedule_collection_check(collection_name):
-    scheduler.add_job(
-        check_collection_status,
-        'interval',
-        minutes=1,
-        args=[collection_name],
-        id=f"check_{collection_name}",
-        replace_existing=True
+def dispatch_letterboxd_refreshes():
+    # Les listes qui changent le plus passent en premier ; chacune a un créneau fixe (crc32 du nom)
+    # dans sa tranche de la fenêtre, pour ne pas solliciter Letterboxd, Plex et Radarr en même temps
+    collections = sorted(
+        letterboxd_collections.items(),
+        key=lambda item: (-item[1].get('change_rate', 1.0), item[0])
     )
-    
-def get_plex_movie_by_imdb(movie_title, imdb_id):
-    plex_movies = plex.library.section(SETTINGS['plex_library'])
+    if not collections:
+        return
+    start = datetime.now(TIMEZONE)
+    slot = LETTERBOXD_REFRESH_WINDOW * 60 / len(collections)
+    for rank, (name, collection) in enumerate(collections):
+        jitter = (zlib.crc32(name.encode('utf-8')) % 1000) / 1000
+        scheduler.add_job(
+            update_letterboxd_collection,
+            'date',
+            run_date=start + timedelta(seconds=(rank + jitter) * slot),
+            args=[name],
+            id=f"update_letterboxd_{name}",
+            jobstore='persistent',
+            replace_existing=True,
+            misfire_grace_time=None
+        )
+    logging.warning(f"Dispatched {len(collections)} Letterboxd refreshes over {LETTERBOXD_REFRESH_WINDOW} minutes")
+
+def sync_scheduled_work():
+    # Rattrape les tâches perdues (collections d'avant le store persistant, worker tué en cours de job)
+    # et relance l'écoute des alertes Plex si le websocket est tombé
+    start_plex_alert_listener()
+    persistent_jobs = scheduler.get_jobs(jobstore='persistent')
+    # Les anciennes tâches cron quotidiennes par liste sont remplacées par dispatch_letterboxd_refreshes
+    legacy_jobs = {job.id for job in persistent_jobs if isinstance(job.trigger, CronTrigger)}
+    jobs = {job.id for job in persistent_jobs}
+    collections = collections_in_progress.items()
+    letterboxd = set(letterboxd_collections)
+    for name, collection in collections:
+        if collection.get('job_status') not in ('queued', 'resolving', 'processing'):
+            continue
+        # Sans battement récent, aucun worker vivant ne porte ce job
+        heartbeat = shared_store.get('job_heartbeats', collection['job_id']) or 0
+        if time.time() - heartbeat > COLLECTION_JOB_STALE_AFTER:
+            logging.warning(f"Resuming interrupted collection job for '{name}'")
+            submit_collection_job(name, collection['job_id'])
+    for job_id in jobs:
+        # Les anciennes tâches check_<collection> sont remplacées par reconcile_collections
+        if job_id.startswith('check_') or job_id in legacy_jobs or \
+                (job_id.startswith('update_letterboxd_') and job_id[len('update_letterboxd_'):] not in letterboxd):
+            try:
+                scheduler.remove_job(job_id, jobstore='persistent')
+            except JobLookupError:
+                pass
+
+def acquire_scheduler_lock():
+    global scheduler_lock_file
+    lock_file = open(SCHEDULER_LOCK_FILE, 'a')
+    try:
+        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        lock_file.close()
+        return False
+    # Le verrou vit aussi longtemps que le fichier reste ouvert dans ce processus
+    scheduler_lock_file = lock_file
+    return True
 
-    # Nettoyage du titre
-    stripped_title = re.sub(r'\s*\(.*?\)\s*', '', movie_title).strip()
-    logging.warning(f"Stripped title for search: {stripped_title}")
+def is_scheduler_owner():
+    return scheduler_lock_file is not None
 
-    # Recherche avec le titre nettoyé
-    results = plex_movies.search(title=stripped_title)
-    logging.warning(f"Search results: {results}")
+def start_scheduler():
+    # Démarré en pause partout pour pouvoir écrire dans le store ; seul le propriétaire exécute
+    scheduler.start(paused=True)
 
-    # Vérification des résultats de la recherche
-    for movie in results:
-        logging.warning(f"Plex title: {movie.title}")
-        for movie_guid in movie.guids:
-            logging.warning(f"GUID found: {movie_guid.id}")
-            if movie_guid.id == f'imdb://tt{imdb_id}':
-                logging.info(f"Found movie in Plex: {movie.title} with matching IMDb ID")
-                return movie.title
-
-    # Si la recherche par titre n'a pas fonctionné, on parcourt tous les films
-    logging.warning(f"No matching title found, searching all movies for IMDb ID {imdb_id}")
-    all_movies = get_all_plex_movies()
+    def become_owner():
+        scheduler.resume()
+        logging.warning(f"Worker {os.getpid()} owns the scheduler")
+        sync_scheduled_work()
+        start_plex_alert_listener()
+
+    if acquire_scheduler_lock():
+        become_owner()
+        return
+
+    def wait_for_lock():
+        while not acquire_scheduler_lock():
+            time.sleep(SCHEDULER_LOCK_RETRY)
+        become_owner()
+
+    threading.Thread(target=wait_for_lock, daemon=True).start()
     
-    for movie in all_movies:
-        results = plex_movies.search(title=movie["title"])
-        for result in results:
-            for movie_guid in result.guids:
-                if movie_guid.id == f'imdb://tt{imdb_id}':
-                    logging.info(f"Found movie in Plex: {result.title} with matching IMDb ID")
-                    return movie.get("title")
-
-    logging.warning(f"Movie with IMDb ID {imdb_id} not found in Plex")
+def get_plex_movie_by_imdb(movie_title, imdb_id):
+    index = get_plex_index()
+    rating_key = index.find_by_imdb(imdb_id)
+    if rating_key:
+        logging.info(f"Found movie in Plex: {index.get(rating_key)['title']} with matching IMDb ID")
+        return index.fetch(rating_key)
+
+    logging.warning(f"Movie '{movie_title}' with IMDb ID {imdb_id} not found in Plex")
     return False
 
-def get_movies_from_letterboxd(url):
-    try:    
-        logging.warning(f"Fetching URL: {url}")
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+LETTERBOXD_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+}
+try:
+    import lxml  # noqa: F401
+    LETTERBOXD_PARSER = 'lxml'
+except ImportError:
+    LETTERBOXD_PARSER = 'html.parser'
+
+letterboxd_session = requests.Session()
+letterboxd_session.headers.update(LETTERBOXD_HEADERS)
+letterboxd_session.mount('https://', requests.adapters.HTTPAdapter(pool_maxsize=LETTERBOXD_WORKERS))
+
+def parse_letterboxd_movies(soup):
+    movies = []
+    for film in soup.select('li.poster-container div.film-poster'):
+        title = film.get('data-film-name')
+        year = film.get('data-film-release-year')
+        if title and year:
+            movies.append(f"{title} ({year})")
+        else:
+            alt_text = film.find('img', class_='image')['alt']
+            logging.warning(f"Using alt text for film: {alt_text}")
+            movies.append(alt_text)
+    return movies
+
+def fetch_letterboxd_page(url, headers=None):
+    response = letterboxd_session.get(url, headers=headers, timeout=LETTERBOXD_TIMEOUT)
+    if response.status_code == 304:
+        return response, None
+    response.raise_for_status()
+    return response, BeautifulSoup(response.text, LETTERBOXD_PARSER)
+
+def letterboxd_page_headers(page):
+    headers = {}
+    if page.get('etag'):
+        headers['If-None-Match'] = page['etag']
+    if page.get('last_modified'):
+        headers['If-Modified-Since'] = page['last_modified']
+    return headers
+
+def fetch_letterboxd_list(url, previous=None):
+    # Première page : titre et nombre de pages ; les suivantes en parallèle.
+    # Chaque page garde ses propres validateurs HTTP (previous['pages']) : une page en 304 reprend les films
+    # déjà connus pour elle. Renvoie None si toutes les pages répondent 304
+    pages = (previous or {}).get('pages') or []
+    known_movies = (previous or {}).get('movies') or []
+    if sum(page.get('size', 0) for page in pages) != len(known_movies):
+        pages = []  # films stockés désynchronisés des pages : tout recharger sans condition
+    offsets = [sum(page['size'] for page in pages[:position]) for position in range(len(pages))]
+
+    def fetch_page(position, page_url):
+        headers = letterboxd_page_headers(pages[position]) if position < len(pages) else None
+        response, soup = fetch_letterboxd_page(page_url, headers)
+        if soup is None:
+            page = pages[position]
+            return page, known_movies[offsets[position]:offsets[position] + page['size']], None
+        movies = parse_letterboxd_movies(soup)
+        page = {
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+            'size': len(movies)
         }
-        response = requests.get(url, headers=headers)
-        logging.warning(f"Response status code: {response.status_code}")
-        
-        soup = BeautifulSoup(response.text, 'html.parser')
-        
-        movies = []
-        film_posters = soup.select('li.poster-container div.film-poster')
-        logging.warning(f"Number of film posters found: {len(film_posters)}")
-        
-        for film in film_posters:
-            title = film.get('data-film-name')
-            year = film.get('data-film-release-year')
-            if title and year:
-                movies.append(f"{title} ({year})")
-            else:
-                alt_text = film.find('img', class_='image')['alt']
-                logging.warning(f"Using alt text for film: {alt_text}")
-                movies.append(alt_text)
-        
-        logging.warning(f"Movies found: {len(movies)}")
-        logging.warning(f"Sample movies: {movies[:5]}")
-        return movies
-    except Exception as e:
-        print(f"Error in get_movies_from_letterboxd: {str(e)}")
-        raise
-
-def get_letterboxd_list_title(url):
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-    }
-    response = requests.get(url, headers=headers)
-    soup = BeautifulSoup(response.text, 'html.parser')
-    title_element = soup.select_one('h1.title-1')
-    if title_element:
-        return title_element.text.strip()
+        return page, movies, soup
+
+    logging.warning(f"Fetching URL: {url}")
+    first_page = fetch_page(0, url)
+    soup = first_page[2]
+    if soup is None:
+        # Première page inchangée : pagination et titre aussi
+        title = None
+        page_count = len(pages)
     else:
-        logging.warning("Title element not found")
-        return "Untitled List"
+        title_element = soup.select_one('h1.title-1')
+        if title_element:
+            title = title_element.text.strip()
+        else:
+            logging.warning("Title element not found")
+            title = "Untitled List"
+        page_numbers = [int(link.text) for link in soup.select('div.paginate-pages li.paginate-page a') if link.text.strip().isdigit()]
+        page_count = max(page_numbers, default=1)
+    base_url = re.sub(r'/page/\d+/?$', '', url.rstrip('/'))
+    page_urls = [f"{base_url}/page/{page}/" for page in range(2, page_count + 1)]
+
+    results = [first_page]
+    if page_urls:
+        with ThreadPoolExecutor(max_workers=LETTERBOXD_WORKERS) as executor:
+            results.extend(executor.map(fetch_page, range(1, page_count), page_urls))
+
+    if all(page_soup is None for _, _, page_soup in results):
+        logging.warning(f"Letterboxd list not modified: {url}")
+        return None
 
+    movies = [movie for _, page_movies, _ in results for movie in page_movies]
+    logging.warning(f"Movies found: {len(movies)} on {page_count} pages")
+    return {
+        'title': title,
+        'movies': movies,
+        'pages': [page for page, _, _ in results]
+    }
 
+def get_movies_from_letterboxd(url):
+    try:
+        return fetch_letterboxd_list(url)['movies']
+    except Exception as e:
+        print(f"Error in get_movies_from_letterboxd: {str(e)}")
+        raise
 
-def is_movie_in_plex_letterboxd(movie_title, year):
-    plex_movies = plex.library.section(SETTINGS['plex_library'])
-    
-    # Nettoyer le titre
-    cleaned_title = re.sub(r'\s*\(.*?\)\s*', '', movie_title).strip()
-    
-    # Rechercher par titre
-    results = plex_movies.search(title=cleaned_title)
-    
+def match_movies_in_plex(movies):
+    # (titre, année) -> ratingKey ou None, dans l'ordre : une passe exacte sur l'index, le matcher flou
+    # local, puis une recherche Plex en parallèle pour les derniers restes.
+    # Réservé au rapprochement de listes : identité IMDb et présence en bibliothèque restent exactes
+    index = get_plex_index()
+    matches = index.find_many_by_title(movies)
+    for position, rating_key in enumerate(matches):
+        if rating_key is None:
+            matches[position] = index.fuzzy_find(*movies[position])
+    leftovers = [position for position, rating_key in enumerate(matches) if rating_key is None]
+    if leftovers:
+        with ThreadPoolExecutor(max_workers=PLEX_SEARCH_WORKERS) as executor:
+            found = executor.map(lambda position: search_plex_title(index, *movies[position]), leftovers)
+            for position, rating_key in zip(leftovers, found):
+                matches[position] = rating_key
+    return matches
+
+def search_plex_title(index, title, year):
+    try:
+        results = plex.library.section(index.section_title).search(title=title)
+    except Exception as e:
+        logging.error(f"Error searching Plex for '{title}': {str(e)}")
+        return None
+    numbers = title_numbers(normalize_title(title))
     for movie in results:
-        if movie.type == 'movie':
-            # Vérifier si l'année correspond (si disponible)
-            if year and str(movie.year) == str(year):
-                return True
-            # Si l'année n'est pas disponible, comparer juste les titres
-            elif not year and movie.title.lower() == cleaned_title.lower():
-                return True
-    
-    return False
-
-def process_letterboxd_list(url):
-    movies = get_movies_from_letterboxd(url)
-    collection_name = get_letterboxd_list_title(url)
-    
-    movies_status = []
-    
-    for movie in movies:
-        title, year = parse_movie_title(movie)
-        in_plex = is_movie_in_plex_letterboxd(title, year)
-        movies_status.append({
-            "title": movie,
-            "in_plex": in_plex
-        })
-    
-    return collection_name, movies_status
+        if title_numbers(normalize_title(movie.title)) != numbers:
+            continue
+        gap = year_gap(year, movie.year)
+        if gap is None or gap <= 1:
+            return str(movie.ratingKey)
+    return None
 
 def parse_movie_title(movie_string):
     match = re.match(r"(.*?)(?:\s*\((\d{4})\))?$", movie_string)
@@ -860,76 +2508,273 @@ def parse_movie_title(movie_string):
     return movie_string, None
 
 def check_collection_status(collection_name):
-    global SETTINGS
-    lib = plex.library.section(SETTINGS['plex_library'])
-    collection = collections_in_progress.get(collection_name)
-    if not collection:
-        return
+    # Cible des anciennes tâches check_<collection> encore présentes dans le store
+    reconcile_collections([collection_name])
+
+# Une seule passe à la fois, et seulement dans le worker propriétaire du scheduler
+reconcile_lock = threading.Lock()
+
+def request_reconcile(names):
+    # Demandes enregistrées dans le store partagé, quel que soit le worker qui reçoit l'événement.
+    # Le propriétaire du scheduler les traite tout de suite, celles des autres workers à sa prochaine passe
+    for name in names:
+        shared_store.put('reconcile_requests', name, time.time())
+    if is_scheduler_owner():
+        collection_executor.submit(reconcile_collections, [])
+
+def reconcile_collections(names=None):
+    # Sans noms : passe planifiée (collections dont le backoff est écoulé) plus les demandes en attente.
+    # Avec des noms : ces collections tout de suite. Une demande faite pendant une passe est lue par
+    # celle-ci en sortant
+    for name in names or ():
+        shared_store.put('reconcile_requests', name, time.time())
+    scheduled = names is None
+    while reconcile_lock.acquire(blocking=False):
+        try:
+            requested = set(shared_store.take('reconcile_requests'))
+            if scheduled or requested:
+                reconcile_pass(requested, scheduled)
+            scheduled = False
+        finally:
+            reconcile_lock.release()
+        if not shared_store.keys('reconcile_requests'):
+            return
 
-    added_count = 0
-    all_movies_available = True
+def reconcile_pass(requested, scheduled):
+    # Une passe pour toutes les collections en attente : un delta Plex, une résolution groupée,
+    # puis un appel Plex par collection
+    now = datetime.now(TIMEZONE)
+    due = {}
+    for name, collection in collections_in_progress.items():
+        if collection.get('status') != 'En cours':
+            continue
+        # Le job de création tourne encore
+        if collection.get('job_status') in ('queued', 'resolving', 'processing'):
+            continue
+        if name in requested or (scheduled and (
+                not collection.get('next_check') or datetime.fromisoformat(collection['next_check']) <= now)):
+            due[name] = collection
+    if not due:
+        return
 
-    for movie_title in collection['movies']:
-        imdb_id = get_imdb_id(movie_title)
-        
-        if imdb_id:
-            plex_movie = get_plex_movie_by_imdb(movie_title, imdb_id)
-            if plex_movie:
-                try:
-                    search = lib.search(plex_movie)
-                    search[0].addCollection(collection_name)
-                    added_count += 1
-                    logging.info(f"Added '{plex_movie.title}' (original title: '{movie_title}', IMDb: {imdb_id}) to collection '{collection_name}'")
-                except Exception as e:
-                    all_movies_available = False
-                    logging.error(f"Error adding '{plex_movie.title}' (original title: '{movie_title}', IMDb: {imdb_id}) to collection: {str(e)}")
+    # Les films attendus viennent peut-être d'être importés : on récupère le delta avant de vérifier
+    refresh_plex_index()
+    # Le delta a pu redemander ces collections via plex_item_added : elles sont déjà dans cette passe
+    for name in due:
+        shared_store.delete('reconcile_requests', name)
+
+    # Seuls les titres pas encore tagués sont retraités, et résolus en un seul lot
+    pending = {}
+    for name, collection in due.items():
+        states = get_movie_states(collection)
+        pending[name] = [movie for movie in collection['movies'] if not states[movie]['tagged']]
+    unresolved = list(dict.fromkeys(
+        movie for name, movies in pending.items() for movie in movies
+        if not due[name]['movie_states'][movie]['imdb_id']
+    ))
+    resolved = resolve_imdb_ids(unresolved) if unresolved else {}
+
+    index = get_plex_index()
+    rating_keys = {}
+    for name, movies in pending.items():
+        states = due[name]['movie_states']
+        rating_keys[name] = []
+        for movie_title in movies:
+            state = states[movie_title]
+            state['imdb_id'] = state['imdb_id'] or resolved.get(movie_title)
+            if not state['imdb_id']:
+                logging.warning(f"Couldn't find IMDb ID for '{movie_title}'")
+                continue
+            # Un ratingKey qui n'est plus dans l'index (film remplacé ou ré-analysé) est recherché à nouveau
+            if state['rating_key'] and index.get(state['rating_key']) is None:
+                state['rating_key'] = None
+            state['rating_key'] = state['rating_key'] or index.find_by_imdb(state['imdb_id'])
+            if state['rating_key']:
+                rating_keys[name].append(state['rating_key'])
+            else:
+                logging.warning(f"Movie '{movie_title}' (IMDb: {state['imdb_id']}) not found in the Plex library.")
+
+    to_tag = [name for name in due if rating_keys[name]]
+    with ThreadPoolExecutor(max_workers=PLEX_EDIT_WORKERS) as executor:
+        tagged_by_name = dict(zip(to_tag, executor.map(
+            lambda name: set(add_movies_to_plex_collection(name, rating_keys[name])), to_tag
+        )))
+
+    for name, collection in due.items():
+        states = collection['movie_states']
+        tagged = tagged_by_name.get(name, set())
+        for movie_title in pending[name]:
+            if states[movie_title]['rating_key'] in tagged:
+                states[movie_title]['tagged'] = True
+                logging.info(f"Added '{movie_title}' (IMDb: {states[movie_title]['imdb_id']}) to collection '{name}'")
             else:
-                all_movies_available = False
-                logging.warning(f"Movie '{movie_title}' (IMDb: {imdb_id}) not found in the Plex library.")
+                # Tag refusé par Plex : le ratingKey est recherché à nouveau à la prochaine passe
+                states[movie_title]['rating_key'] = None
+
+        collection['added_count'] = len([state for state in states.values() if state['tagged']])
+        if collection['added_count'] == len(collection['movies']):
+            collection['status'] = 'Terminé'
+            collection.pop('next_check', None)
+            logging.info(f"Collection '{name}' completed with {collection['added_count']} movies")
         else:
-            all_movies_available = False
-            logging.warning(f"Couldn't find IMDb ID for '{movie_title}'")
-
-    collection['added_count'] = added_count
+            # Backoff exponentiel, remis à zéro dès qu'un film a pu être ajouté
+            attempts = 0 if tagged else collection.get('check_attempts', 0) + 1
+            collection['check_attempts'] = attempts
+            delay = min(COLLECTION_CHECK_MIN_DELAY * 2 ** attempts, COLLECTION_CHECK_MAX_DELAY)
+            collection['next_check'] = (now + timedelta(seconds=delay)).isoformat()
+
+        # Collection supprimée pendant la vérification : ne pas la recréer
+        if name in collections_in_progress:
+            collections_in_progress[name] = collection
+    notify_collections_changed()
+
+def check_waiting_collections(imdb_ids=(), titles=()):
+    # Un film attendu vient d'arriver : les collections qui l'attendent sont vérifiées tout de suite
+    imdb_ids = set(imdb_ids)
+    if not imdb_ids:
+        return
+    waiting = []
+    for name, collection in collections_in_progress.items():
+        if collection.get('status') != 'En cours':
+            continue
+        states = (collection.get('movie_states') or {}).values()
+        if any(state['imdb_id'] in imdb_ids and not state['tagged'] for state in states):
+            waiting.append(name)
+    if waiting:
+        logging.warning(f"Checking collections {waiting} after import")
+        request_reconcile(waiting)
+
+invalidation_bus.subscribe('plex_item_added', check_waiting_collections)
+
+plex_alert_listener = None
+plex_alert_timer = None
+plex_alert_lock = threading.Lock()
+
+def handle_plex_alert(data):
+    # Fin d'analyse d'un film (timeline, type 1, état 5) : un seul delta pour une rafale d'alertes
+    global plex_alert_timer
+    if data.get('type') != 'timeline':
+        return
+    entries = data.get('TimelineEntry', [])
+    if not any(entry.get('type') == 1 and entry.get('state') == 5 for entry in entries):
+        return
+    with plex_alert_lock:
+        if plex_alert_timer is not None and plex_alert_timer.is_alive():
+            return
+        plex_alert_timer = threading.Timer(PLEX_ALERT_DEBOUNCE, refresh_plex_index)
+        plex_alert_timer.daemon = True
+        plex_alert_timer.start()
 
-    if all_movies_available:
-        collection['status'] = 'Terminé'
-        logging.info(f"Collection '{collection_name}' completed with {added_count} movies")
+def start_plex_alert_listener():
+    global plex_alert_listener
+    if not PLEX_ALERT_LISTENER or (plex_alert_listener is not None and plex_alert_listener.is_alive()):
+        return
+    try:
+        import websocket  # noqa: F401 -- requis par plexapi pour le websocket de notifications
+    except ImportError:
+        logging.warning("websocket-client is not installed, Plex alerts disabled (falling back to polling)")
+        return
+    try:
+        plex_alert_listener = plex.startAlertListener(handle_plex_alert)
+        logging.warning("Listening to Plex alerts")
+    except Exception as e:
+        logging.error(f"Error starting Plex alert listener: {str(e)}")
+
+def sync_letterboxd_collection(collection_name, collection, movies):
+    # Ne traite que la différence avec la dernière synchro (plus les titres encore absents de Plex)
+    previous = set(collection.get('movies', []))
+    current = set(movies)
+    if 'missing' in collection:
+        to_add = [movie for movie in movies if movie not in previous or movie in collection['missing']]
     else:
-        collection['status'] = 'En cours'
-        next_check = datetime.now(TIMEZONE) + timedelta(minutes=1)
-        collection['next_check'] = next_check.isoformat()
-        scheduler.add_job(
-            check_collection_status,
-            'date',
-            run_date=next_check,
-            args=[collection_name],
-            id=f"check_{collection_name}",
-            replace_existing=True,
-            misfire_grace_time=300
-        )
-
-    collections_in_progress[collection_name] = collection
+        # Collection d'avant le suivi des absents : une synchro complète, une seule fois
+        to_add = list(movies)
+    to_remove = [movie for movie in collection.get('movies', []) if movie not in current]
+    if not to_add and not to_remove:
+        return 0, 0, []
+
+    index = get_plex_index()
+    plex_library = plex.library.section(index.section_title)
+    try:
+        plex_collection = plex_library.collection(collection_name)
+        in_collection = {str(item.ratingKey) for item in plex_collection.items()}
+    except NotFound:
+        plex_collection = None
+        in_collection = set()
+
+    # titre -> ratingKey effectivement placé dans la collection : les retraits n'ont pas à re-deviner le film
+    rating_keys = collection.setdefault('rating_keys', {})
+
+    missing = []
+    add_keys = {}
+    for movie, rating_key in zip(to_add, match_movies_in_plex([parse_movie_title(movie) for movie in to_add])):
+        if not rating_key:
+            missing.append(movie)
+        elif rating_key in in_collection:
+            rating_keys[movie] = rating_key
+        else:
+            add_keys[movie] = rating_key
+
+    # Titres d'avant le suivi des ratingKeys : même matcher que pour les ajouts
+    unknown = [movie for movie in to_remove if movie not in rating_keys]
+    for movie, rating_key in zip(unknown, match_movies_in_plex([parse_movie_title(movie) for movie in unknown])):
+        if rating_key:
+            rating_keys[movie] = rating_key
+    remove_keys = []
+    for movie in to_remove:
+        rating_key = rating_keys.pop(movie, None)
+        if rating_key in in_collection:
+            remove_keys.append(rating_key)
+
+    added = set(add_movies_to_plex_collection(collection_name, list(add_keys.values()))) if add_keys else set()
+    for movie, rating_key in add_keys.items():
+        if rating_key in added:
+            rating_keys[movie] = rating_key
+        else:
+            missing.append(movie)
+    if remove_keys and plex_collection is not None:
+        plex_collection.removeItems(plex.fetchItems(f"/library/metadata/{','.join(remove_keys)}"))
+    return len(added), len(remove_keys), missing
 
 def update_letterboxd_collection(collection_name):
+    # Nombre de rafraîchissements simultanés limité, même si plusieurs créneaux se chevauchent
+    with letterboxd_refresh_slots:
+        refresh_letterboxd_collection(collection_name)
+
+def record_letterboxd_change(collection, changed):
+    # Moyenne mobile : 1.0 pour une liste qui change à chaque passage, proche de 0 pour une liste figée
+    rate = collection.get('change_rate', 1.0)
+    collection['change_rate'] = round((1 - LETTERBOXD_CHANGE_ALPHA) * rate + LETTERBOXD_CHANGE_ALPHA * (1.0 if changed else 0.0), 3)
+
+def refresh_letterboxd_collection(collection_name):
     try:
         if collection_name in letterboxd_collections:
             collection = letterboxd_collections[collection_name]
-            movies = get_movies_from_letterboxd(collection['url'])
-            
-            plex_library = plex.library.section(SETTINGS['plex_library'])
-            plex_collection = plex_library.collection(collection_name)
-            
-            for movie in movies:
-                title, year = parse_movie_title(movie)
-                if is_movie_in_plex_letterboxd(title, year):
-                    plex_movie = plex_library.search(title=title, year=year)[0]
-                    if plex_movie not in plex_collection.items():
-                        plex_collection.addItems(plex_movie)
+            letterboxd_list = fetch_letterboxd_list(collection['url'], collection)
+            collection['last_checked'] = datetime.now(TIMEZONE).isoformat()
+            if letterboxd_list is None:
+                # 304 : liste inchangée, mais les films absents ont pu être téléchargés depuis
+                record_letterboxd_change(collection, False)
+                added, _, missing = sync_letterboxd_collection(collection_name, collection, collection.get('movies', []))
+                collection['missing'] = missing
+                letterboxd_collections[collection_name] = collection
+                notify_collections_changed()
+                print(f"Letterboxd collection unchanged: {collection_name} (+{added}, {len(missing)} not in Plex)")
+                return
+            movies = letterboxd_list['movies']
+            added, removed, missing = sync_letterboxd_collection(collection_name, collection, movies)
+            record_letterboxd_change(collection, movies != collection.get('movies'))
             
             collection['movies'] = movies
+            collection['missing'] = missing
+            collection['pages'] = letterboxd_list['pages']
+            # Anciens validateurs de la seule première page
+            collection.pop('etag', None)
+            collection.pop('last_modified', None)
             collection['last_updated'] = datetime.now(TIMEZONE).isoformat()
-            print(f"Updated Letterboxd collection: {collection_name}")
+            letterboxd_collections[collection_name] = collection
+            notify_collections_changed()
+            print(f"Updated Letterboxd collection: {collection_name} (+{added} -{removed}, {len(missing)} not in Plex)")
         else:
             print(f"Letterboxd collection not found: {collection_name}")
     except Exception as e:
@@ -937,6 +2782,63 @@ def update_letterboxd_collection(collection_name):
         import traceback
         print(traceback.format_exc())
 
+scheduler.add_job(
+    refresh_plex_index,
+    'interval',
+    seconds=PLEX_INDEX_REFRESH_INTERVAL,
+    next_run_time=datetime.now(TIMEZONE),
+    id="refresh_plex_index",
+    replace_existing=True,
+    coalesce=True,
+    max_instances=1
+)
+scheduler.add_job(
+    reconcile_plex_index,
+    'interval',
+    seconds=PLEX_INDEX_RECONCILE_INTERVAL,
+    id="reconcile_plex_index",
+    replace_existing=True,
+    coalesce=True,
+    max_instances=1
+)
+scheduler.add_job(
+    metadata_cache.refresh_all,
+    'interval',
+    seconds=METADATA_MAX_AGE,
+    next_run_time=datetime.now(TIMEZONE),
+    id="refresh_metadata_cache",
+    replace_existing=True,
+    coalesce=True,
+    max_instances=1
+)
+scheduler.add_job(
+    reconcile_collections,
+    'interval',
+    seconds=COLLECTION_RECONCILE_INTERVAL,
+    id="reconcile_collections",
+    replace_existing=True,
+    coalesce=True,
+    max_instances=1
+)
+scheduler.add_job(
+    dispatch_letterboxd_refreshes,
+    'cron',
+    hour=LETTERBOXD_REFRESH_HOUR,
+    minute=1,
+    id="dispatch_letterboxd_refreshes",
+    replace_existing=True,
+    coalesce=True
+)
+scheduler.add_job(
+    sync_scheduled_work,
+    'interval',
+    seconds=SCHEDULER_SYNC_INTERVAL,
+    id="sync_scheduled_work",
+    replace_existing=True,
+    coalesce=True,
+    max_instances=1
+)
+start_scheduler()
 
 if __name__ == '__main__':
     app.run(host='0.0.0.0', port=9999)
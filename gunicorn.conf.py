@@ -0,0 +1,11 @@
+import os
+
+# Threads plutôt que processus seuls : chaque flux SSE garde un thread ouvert (SSE_MAX_STREAMS par worker)
+bind = f"0.0.0.0:{os.environ.get('PORT', '9999')}"
+workers = int(os.environ.get('WEB_WORKERS', 2))
+worker_class = 'gthread'
+threads = int(os.environ.get('WEB_THREADS', 16))
+timeout = int(os.environ.get('WEB_TIMEOUT', 120))
+graceful_timeout = 30
+keepalive = 5
+accesslog = '-'
@@ -87,25 +87,74 @@ function togglePirateMode(enabled) {
 
 
         function displayResults(data) {
-            const movieList = document.getElementById('movie-list');
-            movieList.innerHTML = '';
-            data.movies.forEach(movie => {
-                const movieElement = document.createElement('div');
-                movieElement.innerHTML = `
-                    <div class="form-check">
-                        <input class="form-check-input" type="checkbox" value="${movie.title} (${movie.year})" data-imdb-id="${movie.imdb_id}" ${movie.in_library ? 'checked' : ''}>
-                        <label class="form-check-label">
-                            ${movie.title} (${movie.year}) - ${movie.in_library ? UI_TRANSLATIONS[currentLanguage].in_library : UI_TRANSLATIONS[currentLanguage].discovery}
-                        </label>
-                    </div>
-                `;
-                movieList.appendChild(movieElement);
-            });
+            startResults();
+            data.movies.forEach(appendMovieResult);
+        }
+
+        function startResults() {
+            document.getElementById('movie-list').innerHTML = '';
             document.getElementById('results-section').style.display = 'block';
             updateSelectAllButton();
             addCreateCollectionButton(); // Ajoute le bouton pour les collections standard
         }
 
+        function appendMovieResult(movie) {
+            const movieList = document.getElementById('movie-list');
+            const movieElement = document.createElement('div');
+            movieElement.innerHTML = `
+                <div class="form-check">
+                    <input class="form-check-input" type="checkbox" value="${movie.title} (${movie.year})" data-imdb-id="${movie.imdb_id}" ${movie.in_library ? 'checked' : ''}>
+                    <label class="form-check-label">
+                        ${movie.title} (${movie.year}) - ${movie.in_library ? UI_TRANSLATIONS[currentLanguage].in_library : UI_TRANSLATIONS[currentLanguage].discovery}
+                    </label>
+                </div>
+            `;
+            movieList.appendChild(movieElement);
+            updateSelectAllButton();
+        }
+
+        // Lit le flux NDJSON de /search_movies/stream et affiche chaque film dès qu'il est vérifié
+        async function streamSearchResults(data) {
+            const response = await fetch('/search_movies/stream', {
+                method: 'POST',
+                headers: {
+                    'Content-Type': 'application/json',
+                },
+                body: JSON.stringify(data)
+            });
+
+            if (!response.ok) {
+                throw new Error(`HTTP error! status: ${response.status}`);
+            }
+
+            const reader = response.body.getReader();
+            const decoder = new TextDecoder();
+            let buffer = '';
+            let started = false;
+            while (true) {
+                const { done, value } = await reader.read();
+                if (done) break;
+                buffer += decoder.decode(value, { stream: true });
+                const lines = buffer.split('\n');
+                buffer = lines.pop();
+                for (const line of lines) {
+                    if (!line.trim()) continue;
+                    const message = JSON.parse(line);
+                    if (message.type === 'error') {
+                        throw message;
+                    }
+                    if (!started) {
+                        startResults();
+                        hideLoading();
+                        started = true;
+                    }
+                    if (message.type === 'movie') {
+                        appendMovieResult(message.movie);
+                    }
+                }
+            }
+        }
+
     function updateSelectAllButton() {
         const checkboxes = document.querySelectorAll('#movie-list input[type="checkbox"]');
         const selectAllBtn = document.getElementById('select-all-btn');
@@ -165,9 +214,18 @@ function togglePirateMode(enabled) {
         function updateCollectionsList() {
             axios.get('/collections_status')
                 .then(function (response) {
+                    renderCollectionsList(response.data);
+                })
+                .catch(function (error) {
+                    console.error('Error:', error);
+                });
+        }
+
+        function renderCollectionsList(collections) {
                     const collectionsList = document.getElementById('collections-list');
+                    if (!collectionsList) return;
                     collectionsList.innerHTML = '';
-                    response.data.forEach(collection => {
+                    collections.forEach(collection => {
                         const collectionElement = document.createElement('div');
                         collectionElement.classList.add('collection-item');
                         
@@ -194,6 +252,9 @@ function togglePirateMode(enabled) {
                             if (statusKey === 'in_progress') {
                                 statusHtml += ' <div class="loading-spinner"></div>';
                             }
+                            if (collection.job_status && collection.job_status !== 'done') {
+                                statusHtml += ` (${collection.job_status})`;
+                            }
         
                             collectionHtml += `
                                 <p>${UI_TRANSLATIONS[currentLanguage].movies_added}: ${collection.added_count}/${collection.total_count}</p>
@@ -208,10 +269,36 @@ function togglePirateMode(enabled) {
                         collectionElement.innerHTML = collectionHtml;
                         collectionsList.appendChild(collectionElement);
                     });
-                })
-                .catch(function (error) {
-                    console.error('Error:', error);
+        }
+
+        // État local des collections, tenu à jour par les deltas du flux SSE
+        const collectionsState = {};
+
+        function subscribeCollectionsStatus() {
+            if (!window.EventSource) {
+                updateCollectionsList();
+                setInterval(updateCollectionsList, 30000);
+                return;
+            }
+            const source = new EventSource('/collections_status/stream');
+            source.addEventListener('error', function () {
+                // Flux refusé (trop de connexions) : le navigateur ne réessaie pas, on repasse au polling
+                if (source.readyState === EventSource.CLOSED) {
+                    updateCollectionsList();
+                    setInterval(updateCollectionsList, 30000);
+                }
+            });
+            source.addEventListener('update', function (event) {
+                const delta = JSON.parse(event.data);
+                if (delta.reset) {
+                    Object.keys(collectionsState).forEach(name => delete collectionsState[name]);
+                }
+                delta.removed.forEach(name => delete collectionsState[name]);
+                Object.entries(delta.changed).forEach(([name, fields]) => {
+                    collectionsState[name] = Object.assign(collectionsState[name] || {}, fields);
                 });
+                renderCollectionsList(Object.values(collectionsState));
+            });
         }
         
 
@@ -298,20 +385,7 @@ function togglePirateMode(enabled) {
 
 
         try {
-            const response = await fetch('/search_movies', {
-                method: 'POST',
-                headers: {
-                    'Content-Type': 'application/json',
-                },
-                body: JSON.stringify(data)
-            });
-
-            if (!response.ok) {
-                throw new Error(`HTTP error! status: ${response.status}`);
-            }
-
-            const result = await response.json();
-            displayResults(result);
+            await streamSearchResults(data);
             } catch(error) {
                 console.error('Error:', error);
                 let errorMessage = 'An unknown error occurred';
@@ -490,13 +564,10 @@ function addCreateCollectionButton(isLetterboxd = false, collectionName = '', le
                  // Mettre à jour l'exemple immédiatement après le changement de langue
             }
 
-        // Call updateCollectionsList every 30 seconds
-        setInterval(updateCollectionsList, 30000);
         document.addEventListener('DOMContentLoaded', loadSettings);
 
         function startCollectionStatusUpdates() {
-            updateCollectionsList();
-            setInterval(updateCollectionsList, 5000); // Mise à jour toutes les 5 secondes
+            subscribeCollectionsStatus(); // Le serveur pousse les changements, plus de polling
         }
 
         // Appelez cette fonction au chargement de la page
@@ -0,0 +1,60 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from title_matching import TitleTrigramIndex, normalize_title, title_numbers
+
+LIBRARY = [
+    ('scream', 'Scream', None, 1996),
+    ('saw', 'Saw', None, 2004),
+    ('rocky', 'Rocky', None, 1976),
+    ('fast', 'Fast Five', None, 2011),
+    ('star-wars', 'Star Wars', None, 1977),
+    ('matrix', 'The Matrix', None, 1999),
+    ('amelie', 'Amélie', "Le Fabuleux Destin d'Amélie Poulain", 2001),
+]
+
+@pytest.fixture
+def index():
+    index = TitleTrigramIndex(0.6)
+    for key, title, original_title, year in LIBRARY:
+        titles = {normalize_title(title)}
+        if original_title:
+            titles.add(normalize_title(original_title))
+        index.add(key, titles, year)
+    return index
+
+@pytest.mark.parametrize('title, year', [
+    ('Scream 2', 1997),
+    ('Saw II', 2005),
+    ('Saw V', 2008),
+    ('Rocky V', 1990),
+    ('Fast X', 2023),
+    ('Star Wars: Episode V - The Empire Strikes Back', 1980),
+])
+def test_sequels_do_not_match_the_original(index, title, year):
+    assert index.find(title, year) is None
+    assert index.find(title) is None
+
+def test_sequel_matches_its_other_numbering(index):
+    index.add('saw-2', {normalize_title('Saw 2')}, 2005)
+    assert index.find('Saw II', 2005) == 'saw-2'
+
+def test_roman_and_arabic_numbers_are_equivalent():
+    assert title_numbers(normalize_title('Rocky V')) == title_numbers(normalize_title('Rocky 5')) == {5}
+    assert title_numbers(normalize_title('Fast X')) == {10}
+
+def test_articles_and_accents_are_ignored(index):
+    assert index.find('Matrix', 1999) == 'matrix'
+    assert index.find("Le fabuleux destin d'Amelie Poulain", 2001) == 'amelie'
+
+def test_year_gap_over_one_rejects_match(index):
+    assert index.find('Scream', 1996) == 'scream'
+    assert index.find('Scream', 2022) is None
+
+def test_removed_titles_are_no_longer_found(index):
+    index.remove('matrix', {normalize_title('The Matrix')})
+    assert index.find('The Matrix', 1999) is None
@@ -0,0 +1,84 @@
+import re
+import unicodedata
+from collections import Counter
+
+# Articles retirés en tête de titre : "The Matrix", "La Haine", "L'Odyssée" se comparent sans eux
+TITLE_ARTICLES = {'the', 'a', 'an', 'le', 'la', 'les', 'l', 'un', 'une', 'des', 'el', 'los', 'las', 'der', 'das', 'il', 'gli', 'lo'}
+
+# "i" est exclu : trop souvent le pronom anglais ("I, Robot")
+ROMAN_NUMERALS = {'ii': 2, 'iii': 3, 'iv': 4, 'v': 5, 'vi': 6, 'vii': 7, 'viii': 8, 'ix': 9, 'x': 10, 'xi': 11, 'xii': 12}
+
+def normalize_title(title):
+    # Titre sans année/parenthèses, en minuscules, sans accents, ponctuation et article initial retirés
+    title = re.sub(r'\s*\(.*?\)\s*', ' ', title or '')
+    title = unicodedata.normalize('NFKD', title.lower())
+    title = ''.join(char for char in title if not unicodedata.combining(char))
+    words = re.sub(r'[^\w\s]', ' ', title).split()
+    if len(words) > 1 and words[0] in TITLE_ARTICLES:
+        words = words[1:]
+    return ' '.join(words)
+
+def title_trigrams(title):
+    padded = f"  {title} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+def title_numbers(title):
+    # Numéros de suite ("Scream 2", "Saw II") : deux titres aux numéros différents ne sont jamais le même film
+    return {int(word) if word.isdigit() else ROMAN_NUMERALS[word]
+            for word in title.split() if word.isdigit() or word in ROMAN_NUMERALS}
+
+def year_gap(first, second):
+    if not first or not second or not str(first).isdigit() or not str(second).isdigit():
+        return None
+    return abs(int(first) - int(second))
+
+class TitleTrigramIndex:
+    # Rapprochement flou local : score de Dice sur les trigrammes des titres normalisés.
+    # Pas de verrou ici, l'appelant (PlexLibraryIndex) s'en charge
+    def __init__(self, threshold):
+        self.threshold = threshold
+        self.by_trigram = {}  # trigramme -> set((clé, titre normalisé))
+        self.sizes = {}       # (clé, titre normalisé) -> nombre de trigrammes
+        self.years = {}       # clé -> année ou None
+
+    def add(self, key, titles, year=None):
+        self.years[key] = year
+        for title in titles:
+            trigrams = title_trigrams(title)
+            self.sizes[(key, title)] = len(trigrams)
+            for trigram in trigrams:
+                self.by_trigram.setdefault(trigram, set()).add((key, title))
+
+    def remove(self, key, titles):
+        self.years.pop(key, None)
+        for title in titles:
+            self.sizes.pop((key, title), None)
+            for trigram in title_trigrams(title):
+                variants = self.by_trigram.get(trigram)
+                if variants:
+                    variants.discard((key, title))
+                    if not variants:
+                        del self.by_trigram[trigram]
+
+    def find(self, title, year=None):
+        # Année à un an près si connue ; sans année, on exige une correspondance plus proche
+        query = normalize_title(title)
+        if not query:
+            return None
+        trigrams = title_trigrams(query)
+        threshold = self.threshold if year else min(self.threshold + 0.15, 1.0)
+        numbers = title_numbers(query)
+        shared = Counter()
+        for trigram in trigrams:
+            shared.update(self.by_trigram.get(trigram, ()))
+        best, best_score = None, threshold
+        for (key, variant), count in shared.items():
+            score = 2 * count / (len(trigrams) + self.sizes[(key, variant)])
+            gap = year_gap(year, self.years.get(key))
+            if gap is not None:
+                if gap > 1:
+                    continue
+                score -= 0.05 * gap
+            if score >= best_score and title_numbers(variant) == numbers:
+                best, best_score = key, score
+        return best
@@ -781,8 +781,9 @@ TRANSLATIONS = {
         Use the following JSON schema:
         {schema}
         """,
-        "library_prompt": "Based on the following list of movies in the user's Plex library: {movies}, suggest {count} movies related to the theme: {theme}. Only suggest movies from this list.",
+        "library_prompt": "Here is the user's Plex library, one movie per line as id|title|year:\n{movies}\nSuggest {count} movies from this list related to the theme: {theme}. Only suggest movies from this list and give the id of each movie.",
         "general_prompt": "Suggest {count} movies related to the theme: {theme}.",
+        "exclude_prompt": "Do not suggest any of these movies again: {movies}.",
         "error_message": "Error getting recommendations from ai: {error}"
     },
     "pirate": {
@@ -792,8 +793,9 @@ TRANSLATIONS = {
         Use the following JSON schema:
         {schema}
         """,
-        "library_prompt": "Based on the following list of movies in the user's Plex library: {movies}, suggest {count} movies related to the theme: {theme}. Only suggest movies from this list.",
+        "library_prompt": "Here is the user's Plex library, one movie per line as id|title|year:\n{movies}\nSuggest {count} movies from this list related to the theme: {theme}. Only suggest movies from this list and give the id of each movie.",
         "general_prompt": "Suggest {count} movies related to the theme: {theme}.",
+        "exclude_prompt": "Do not suggest any of these movies again: {movies}.",
         "error_message": "Error getting recommendations from ai: {error}"
     },
     "french": {
@@ -803,8 +805,9 @@ TRANSLATIONS = {
         Utilisez le schéma JSON suivant :
         {schema}
         """,
-        "library_prompt": "En vous basant sur la liste suivante de films de la bibliothèque Plex de l'utilisateur : {movies}, suggérez {count} films liés au thème : {theme}. Ne suggérez que des films de cette liste.",
+        "library_prompt": "Voici la bibliothèque Plex de l'utilisateur, un film par ligne au format id|titre|année :\n{movies}\nSuggérez {count} films de cette liste liés au thème : {theme}. Ne suggérez que des films de cette liste et indiquez l'id de chaque film.",
         "general_prompt": "Suggérez {count} films liés au thème : {theme}.",
+        "exclude_prompt": "Ne suggérez à nouveau aucun de ces films : {movies}.",
         "error_message": "Erreur lors de l'obtention des recommandations de ai : {error}"
     },
     "spanish": {
@@ -814,8 +817,9 @@ TRANSLATIONS = {
         Utiliza el siguiente esquema JSON:
         {schema}
         """,
-        "library_prompt": "Basado en la siguiente lista de películas en la biblioteca Plex del usuario: {movies}, sugiere {count} películas relacionadas con el tema: {theme}. Solo sugiere películas de esta lista.",
+        "library_prompt": "Esta es la biblioteca Plex del usuario, una película por línea con el formato id|título|año:\n{movies}\nSugiere {count} películas de esta lista relacionadas con el tema: {theme}. Solo sugiere películas de esta lista e indica el id de cada película.",
         "general_prompt": "Sugiere {count} películas relacionadas con el tema: {theme}.",
+        "exclude_prompt": "No vuelvas a sugerir ninguna de estas películas: {movies}.",
         "error_message": "Error al obtener recomendaciones de ai: {error}"
     },
     "german": {
@@ -825,8 +829,9 @@ TRANSLATIONS = {
         Verwenden Sie das folgende JSON-Schema:
         {schema}
         """,
-        "library_prompt": "Basierend auf der folgenden Liste von Filmen in der Plex-Bibliothek des Benutzers: {movies}, schlagen Sie {count} Filme vor, die zum Thema passen: {theme}. Schlagen Sie nur Filme aus dieser Liste vor.",
+        "library_prompt": "Hier ist die Plex-Bibliothek des Benutzers, ein Film pro Zeile im Format id|Titel|Jahr:\n{movies}\nSchlagen Sie {count} Filme aus dieser Liste vor, die zum Thema passen: {theme}. Schlagen Sie nur Filme aus dieser Liste vor und geben Sie die id jedes Films an.",
         "general_prompt": "Schlagen Sie {count} Filme vor, die zum Thema passen: {theme}.",
+        "exclude_prompt": "Schlagen Sie keinen dieser Filme erneut vor: {movies}.",
         "error_message": "Fehler beim Abrufen von Empfehlungen von ai: {error}"
     },
     "italian": {
@@ -836,8 +841,9 @@ TRANSLATIONS = {
         Utilizza il seguente schema JSON:
         {schema}
         """,
-        "library_prompt": "Basato sulla seguente lista di film nella libreria Plex dell'utente: {movies}, suggerisci {count} film relativi al tema: {theme}. Suggerisci solo film da questa lista.",
+        "library_prompt": "Ecco la libreria Plex dell'utente, un film per riga nel formato id|titolo|anno:\n{movies}\nSuggerisci {count} film di questa lista relativi al tema: {theme}. Suggerisci solo film da questa lista e indica l'id di ogni film.",
         "general_prompt": "Suggerisci {count} film relativi al tema: {theme}.",
+        "exclude_prompt": "Non suggerire di nuovo nessuno di questi film: {movies}.",
         "error_message": "Errore nel ricevere raccomandazioni da ai: {error}"
     },
     "russian": {
@@ -848,8 +854,9 @@ TRANSLATIONS = {
         Используйте следующую схему JSON:
         {schema}
         """,
-        "library_prompt": "Основываясь на следующем списке фильмов в библиотеке Plex пользователя: {movies}, предложите {count} фильмов, связанных с темой: {theme}. Предлагайте только фильмы из этого списка.",
+        "library_prompt": "Вот библиотека Plex пользователя, по одному фильму в строке в формате id|название|год:\n{movies}\nПредложите {count} фильмов из этого списка, связанных с темой: {theme}. Предлагайте только фильмы из этого списка и указывайте id каждого фильма.",
         "general_prompt": "Предложите {count} фильмов, связанных с темой: {theme}.",
+        "exclude_prompt": "Не предлагайте повторно ни один из этих фильмов: {movies}.",
         "error_message": "Ошибка при получении рекомендаций от ai: {error}"
     },
     "japanese": {
@@ -860,8 +867,9 @@ TRANSLATIONS = {
         以下のJSONスキーマを使用してください：
         {schema}
         """,
-        "library_prompt": "ユーザーのPlexライブラリにある次の映画リストに基づいて、テーマに関連する{count}本の映画を提案してください：{movies}。このリストからのみ映画を提案してください。",
+        "library_prompt": "ユーザーのPlexライブラリです（1行に1本、id|タイトル|年の形式）：\n{movies}\nこのリストから、テーマ「{theme}」に関連する映画を{count}本提案してください。このリストからのみ提案し、各映画のidを含めてください。",
         "general_prompt": "テーマに関連する{count}本の映画を提案してください：{theme}。",
+        "exclude_prompt": "次の映画は再度提案しないでください：{movies}。",
         "error_message": "aiからの推奨取得エラー：{error}"
     },
     "portuguese": {
@@ -871,8 +879,9 @@ TRANSLATIONS = {
         Use o seguinte esquema JSON:
         {schema}
         """,
-        "library_prompt": "Com base na seguinte lista de filmes na biblioteca Plex do usuário: {movies}, sugira {count} filmes relacionados ao tema: {theme}. Sugira apenas filmes desta lista.",
+        "library_prompt": "Esta é a biblioteca Plex do usuário, um filme por linha no formato id|título|ano:\n{movies}\nSugira {count} filmes desta lista relacionados ao tema: {theme}. Sugira apenas filmes desta lista e informe o id de cada filme.",
         "general_prompt": "Sugira {count} filmes relacionados ao tema: {theme}.",
+        "exclude_prompt": "Não sugira novamente nenhum destes filmes: {movies}.",
         "error_message": "Erro ao obter recomendações de ai: {error}"
     }
 }
\ No newline at end of file